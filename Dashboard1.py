@@ -6,8 +6,17 @@ import plotly.graph_objects as go
 from PIL import Image
 import base64
 from io import BytesIO
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 
+import caches
+import aggregations
+import datastore
+import dimensions
+import fiscal_calendar
+import theme
+import tracing
+
 # Page Configuration handled by main.py(when we are merging all dashboards)
 
 # Function to load and encode image to base64
@@ -79,7 +88,7 @@ def init_db_connection():
         return None
 
 # Image to base64 conversion function
-@st.cache_data
+@caches.governed_cache("images", max_entries=16)
 def get_image_as_base64(path):
     try:
         with open(path, "rb") as image_file:
@@ -92,8 +101,7 @@ def get_image_as_base64(path):
         st.warning(f"Image file not found at path: '{path}'. Please ensure it is in the correct directory.")
         return "data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7"
 
-# Database-connected data loading function
-@st.cache_data(ttl=600)
+# Database-connected data loading function, shared across sessions through datastore
 def load_data():
     try:
         sql_query = """
@@ -105,26 +113,14 @@ def load_data():
             CD.AffectedPeople,
             CD.DeadPeople,
             CD.TotalNightShelter,
-            PA_Agg.TotalDistrictAllotedAmount AS AllotedAmount,
             CD.AmountSpent,
             CD.BlanketDistribution,
             CD.TotalPeopleNightShelter,
             CD.WoodWt,
             CD.BonfirePlace,
-            D.DistrictCode
+            CD.DistrictCode
         FROM
             dbo.ColdWaveDetails AS CD
-        LEFT JOIN
-            (
-                SELECT
-                    DistrictCode,
-                    SUM(AllotedAmount) AS TotalDistrictAllotedAmount
-                FROM
-                    dbo.ColdWavepaymentAllotment
-                GROUP BY
-                    DistrictCode
-            ) AS PA_Agg
-            ON CD.DistrictCode = PA_Agg.DistrictCode
         LEFT JOIN
             dbo.mst_Districts AS D ON CD.DistrictCode = D.DistrictCode
         LEFT JOIN
@@ -145,7 +141,6 @@ def load_data():
             'AffectedPeople': 'affected_population_lac',
             'DeadPeople': 'death',
             'TotalNightShelter': 'rain_basera',
-            'AllotedAmount': 'alloted_amount_lac',
             'AmountSpent': 'expenditure_amount_lac',
             'BlanketDistribution': 'blanket_distributed',
             'TotalPeopleNightShelter': 'people_in_rain_basera',
@@ -161,7 +156,7 @@ def load_data():
         df_loaded['date'] = pd.to_datetime(df_loaded['date'], errors='coerce')
         numeric_cols = [
             'affected_forms_filled', 'affected_population_lac', 'death', 'rain_basera',
-            'alloted_amount_lac', 'expenditure_amount_lac', 'blanket_distributed',
+            'expenditure_amount_lac', 'blanket_distributed',
             'people_in_rain_basera', 'wood_burn_kg', 'bonfire_places'
         ]
         for col in numeric_cols:
@@ -174,8 +169,10 @@ def load_data():
 
         df_loaded['district'] = df_loaded['district'].fillna('Unknown')
         df_loaded['block'] = df_loaded['block'].fillna('Unknown')
+        df_loaded['district_code'] = pd.to_numeric(df_loaded['district_code'], errors='coerce').fillna(-1).astype('int64')
 
         df_loaded.dropna(subset=['date'], inplace=True)
+        fiscal_calendar.add_calendar_columns(df_loaded, 'date')
 
         return df_loaded
     except Exception as e:
@@ -183,97 +180,107 @@ def load_data():
         st.error("Please check your database connection, secrets file, and SQL query.")
         return pd.DataFrame()
 
-def run():
-    # --- Load data ---
-    with st.spinner('Presenting the Cold Wave Dashboard for you... Thank you for your Patience'):
-        df_main = load_data()
-    if df_main.empty:
-        st.error("🚨 Unable to load cold wave data. Please check database connection and try again.")
-        st.info("💡 Ensure your database server is running and accessible.")
-        return
-
-    # Preparing filter data for horizontal layout below header
-    if 'district' in df_main.columns and not df_main['district'].empty:
-        unique_districts = sorted(list(df_main['district'].unique()))
-    else:
-        unique_districts = []
-
-    min_date_data = pd.to_datetime('2022-12-15').date() 
-    if not df_main.empty and 'date' in df_main.columns and not df_main['date'].min() is pd.NaT:
-        min_date_data = min(min_date_data, df_main['date'].min().date()) 
-
-    # Setting the default end date for the filter to today's actual date
-    default_end_date_filter = datetime.now().date()
-    # The default start date for the filter should be the min date of our records
-    default_start_date_filter = min_date_data
-
-    # Ensuring the default range is valid (start <= end)
-    if default_start_date_filter > default_end_date_filter:
-        default_start_date_filter = default_end_date_filter - timedelta(days=30) # Fallback to 30 days before if somehow start > end
-
-
-    # Main Page Header
-    eoc_logo_header_base64 = get_image_as_base64("eoc_logo.png")
-    header_logo_html = f'<img src="{eoc_logo_header_base64}" alt="EOC" class="header-logo-img">' if eoc_logo_header_base64 else ""
-    st.markdown(f"""
-        <div class="dashboard-header">
-            {header_logo_html}
-            <div class="header-title-block">
-                <h1>ColdWave Dashboard</h1>
-                <p class="tagline">Emergency Operations Center - Government of Bihar</p>
-            </div>
-        </div>
-    """, unsafe_allow_html=True)
-
-    # Creating minimal horizontal layout for filters
-    col1, col2, col3 = st.columns([1, 1, 1.2])
-
-    with col1:
-        selected_district_filter = st.selectbox(
-            "District",
-            options=unique_districts,
-            key="sb_dist_filter",
-            placeholder="Select District",
-            index=None
-        )
+# District allotment totals, a small table that changes far less often than the daily records.
+# Loaded as its own dataset with a long TTL and joined to the records by district code in memory.
+def load_allotments():
+    try:
+        sql_query = """
+        SELECT
+            DistrictCode,
+            SUM(AllotedAmount) AS TotalDistrictAllotedAmount
+        FROM
+            dbo.ColdWavepaymentAllotment
+        GROUP BY
+            DistrictCode;
+        """
+        engine = init_db_connection()
+        if engine is None:
+            return pd.DataFrame()
 
-    with col2:
-        if 'block' in df_main.columns:
-            if selected_district_filter:
-                unique_blocks_for_district = df_main[df_main['district'] == selected_district_filter]['block'].unique()
-                block_options = sorted(list(unique_blocks_for_district))
-            else:
-                block_options = sorted(list(df_main['block'].unique()))
-        else:
-            block_options = []
-        selected_block_filter = st.selectbox(
-            "Block",
-            options=block_options,
-            key="sb_block_filter",
-            placeholder="Select Block",
-            index=None
-        )
+        df_allot = pd.read_sql(sql_query, engine)
+        df_allot = df_allot.rename(columns={'DistrictCode': 'district_code', 'TotalDistrictAllotedAmount': 'alloted_amount_lac'})
+        df_allot['district_code'] = pd.to_numeric(df_allot['district_code'], errors='coerce')
+        df_allot['alloted_amount_lac'] = pd.to_numeric(df_allot['alloted_amount_lac'], errors='coerce').fillna(0)
+        return df_allot.dropna(subset=['district_code']).astype({'district_code': 'int64'})
+    except Exception as e:
+        st.error(f"An error occurred while loading the district allotments: {e}")
+        return pd.DataFrame()
 
-    with col3:
-        date_input_value = st.date_input(
-            "Select Date Range",
-            value=[default_start_date_filter, default_end_date_filter],
-            min_value=min_date_data,
-            max_value=default_end_date_filter,
-            key="di_date"
-        )
+def build_allotment_lookup(df):
+    """alloted_amount_lac indexed by district_code."""
+    if df.empty:
+        return pd.Series(dtype='float64')
+    return df.set_index('district_code')['alloted_amount_lac']
+
+COLD_WAVE = datastore.DatasetSpec("cold_wave", load_data, ttl=600)
+# Allotments change a few times a season; six hours is fresh enough
+ALLOTMENTS = datastore.DatasetSpec("cold_wave_allotments", load_allotments, ttl=6 * 3600)
+DATASETS = [COLD_WAVE, ALLOTMENTS]
+
+def build_dimensions(df):
+    """District list and district -> blocks hierarchy for the filter selectboxes."""
+    return dimensions.build_dimensions(df, ['district', 'block'], hierarchies=[('district', 'block')])
+
+# Columns shown on the KPI cards and time series as plain sums. The allotment is a district-level
+# figure looked up by district code (see load_allotments), counted once per district present.
+KPI_SUM_COLS = [
+    'affected_forms_filled', 'affected_population_lac', 'death', 'rain_basera',
+    'expenditure_amount_lac', 'blanket_distributed', 'people_in_rain_basera',
+    'wood_burn_kg', 'bonfire_places'
+]
+KPI_INPUT_COLS = ['date', 'district_code'] + KPI_SUM_COLS
+TREEMAP_INPUT_COLS = ['district', 'block', 'affected_population_lac']
+
+def filter_masks(df, start_date, end_date, district=None, block=None):
+    """(treemap_mask, kpi_mask) row masks over `df` for the selected filters.
+
+    The treemap covers the date range and district; the KPIs and time series also narrow to the
+    block. Consumers gather their rows and columns with df.loc[mask, cols], so the cold-wave frame
+    itself is never copied.
+    """
+    day = df['day_ordinal']
+    treemap_mask = (day >= fiscal_calendar.day_ordinal(start_date)) & (day <= fiscal_calendar.day_ordinal(end_date))
+    if district:
+        treemap_mask &= df['district'] == district
+    kpi_mask = treemap_mask
+    if district and block:
+        kpi_mask = treemap_mask & (df['block'] == block)
+    return treemap_mask, kpi_mask
+
+@dataclass(frozen=True)
+class ColdWaveKpis:
+    timeseries: pd.DataFrame  # one row per date, KPI_SUM_COLS + alloted_amount_lac
+    today: pd.Series          # totals on the reference date
+    till_now: pd.Series       # totals over the whole filtered period
+
+def compute_kpis(kpi_df, today_date, allotments):
+    """Computes the daily series and the Today/Till Now card totals from one grouped pass.
+
+    The filtered frame is scanned once, by a (date, district) aggregation; the daily series and
+    the card totals are derived from that small result, with each district's allotment looked up
+    in `allotments` (alloted_amount_lac by district_code).
+    """
+    kpi_cols = KPI_SUM_COLS + ['alloted_amount_lac']
+    if kpi_df.empty:
+        timeseries = pd.DataFrame(columns=['date'] + kpi_cols)
+        timeseries['date'] = pd.to_datetime(timeseries['date'])
+        zeros = pd.Series(0.0, index=kpi_cols)
+        return ColdWaveKpis(timeseries, zeros, zeros)
+
+    per_day_district = aggregations.aggregate(kpi_df, ['date', 'district_code'], sums=KPI_SUM_COLS).reset_index()
+    per_day_district['alloted_amount_lac'] = allotments.reindex(per_day_district['district_code']).fillna(0).to_numpy()
+    daily = aggregations.aggregate(per_day_district, 'date', sums=kpi_cols)
+
+    till_now = daily[KPI_SUM_COLS].sum()
+    till_now['alloted_amount_lac'] = allotments.reindex(per_day_district['district_code'].unique()).fillna(0).sum()
+    if today_date in daily.index:
+        today = daily.loc[today_date, kpi_cols]
+    else:
+        today = pd.Series(0.0, index=kpi_cols)
 
-    # Processing date range
-    if len(date_input_value) == 2:
-        start_date_filter_selected, end_date_filter_selected = pd.to_datetime(date_input_value[0]), pd.to_datetime(date_input_value[1])
-        if start_date_filter_selected > end_date_filter_selected:
-            st.error("Error: Start date cannot be after end date. Adjusting range to default.")
-            start_date_filter_selected, end_date_filter_selected = pd.to_datetime(default_start_date_filter), pd.to_datetime(default_end_date_filter)
-        date_range = [start_date_filter_selected, end_date_filter_selected]
-    else: # This handles the case where only one date is selected, which can happen initially
-        date_range = [pd.to_datetime(default_start_date_filter), pd.to_datetime(default_end_date_filter)]
+    return ColdWaveKpis(daily.reset_index(), today, till_now)
 
-    st.markdown("""
+DASHBOARD_CSS = """
 <style>
 /* Keyframes for Single Line Border Tracing Animation */
 @keyframes border-trace-single {
@@ -451,55 +458,118 @@ div[data-testid="stDateInput"]:hover > div > div {
 .footer-title { color: #ffc107 !important; font-size: 1rem !important; font-weight: 500 !important; margin-bottom: 0.5rem !important; }
 .footer-card p { margin-bottom: 0.25rem; font-size: 0.75rem;}
 </style>
-    """, unsafe_allow_html=True)
+"""
 
+def run():
+    theme.apply_theme("dashboard1", DASHBOARD_CSS)
+
+    # --- Load data ---
+    with st.spinner('Presenting the Cold Wave Dashboard for you... Thank you for your Patience'):
+        with tracing.span("load") as load_span:
+            dataset = COLD_WAVE.get()
+            df_main = dataset.view()
+            allotments = ALLOTMENTS.get()
+            allotment_lookup = allotments.derive("lookup", build_allotment_lookup)
+            load_span["rows"] = len(df_main)
     if df_main.empty:
-        st.error("Dashboard cannot be displayed because no data could be loaded.")
-        st.stop()
+        st.error("🚨 Unable to load cold wave data. Please check database connection and try again.")
+        st.info("💡 Ensure your database server is running and accessible.")
+        return
 
-    # Applying filters to create `kpi_ts_df` for charts and "Till Now" KPIs
-    # This dataframe is based on the selected date range.
-    base_filtered_df = df_main.copy()
-    start_date_filtered, end_date_filtered = date_range[0], date_range[1]
-    base_filtered_df = base_filtered_df[(base_filtered_df['date'] >= start_date_filtered) & (base_filtered_df['date'] <= end_date_filtered)]
+    # Preparing filter data for horizontal layout below header
+    dims = dataset.derive("dimensions", build_dimensions)
+    unique_districts = list(dims.values('district'))
 
-    kpi_ts_df = base_filtered_df.copy() # This will be used for Time Series charts and 'Till Now' KPIs
+    min_date_data = pd.to_datetime('2022-12-15').date() 
+    if not df_main.empty and 'date' in df_main.columns and not df_main['date'].min() is pd.NaT:
+        min_date_data = min(min_date_data, df_main['date'].min().date()) 
 
-    if selected_district_filter and 'district' in kpi_ts_df.columns:
-        kpi_ts_df = kpi_ts_df[kpi_ts_df['district'] == selected_district_filter]
-        if selected_block_filter and 'block' in kpi_ts_df.columns:
-            kpi_ts_df = kpi_ts_df[kpi_ts_df['block'] == selected_block_filter]
+    # Setting the default end date for the filter to today's actual date
+    default_end_date_filter = datetime.now().date()
+    # The default start date for the filter should be the min date of our records
+    default_start_date_filter = min_date_data
 
+    # Ensuring the default range is valid (start <= end)
+    if default_start_date_filter > default_end_date_filter:
+        default_start_date_filter = default_end_date_filter - timedelta(days=30) # Fallback to 30 days before if somehow start > end
 
-    today_kpi_reference_date = end_date_filter_selected
-    today_df = kpi_ts_df[kpi_ts_df['date'] == today_kpi_reference_date.normalize()]
-    tillnow_df_for_kpis = kpi_ts_df.copy()
 
+    # Main Page Header
+    eoc_logo_header_base64 = get_image_as_base64("eoc_logo.png")
+    header_logo_html = f'<img src="{eoc_logo_header_base64}" alt="EOC" class="header-logo-img">' if eoc_logo_header_base64 else ""
+    st.markdown(f"""
+        <div class="dashboard-header">
+            {header_logo_html}
+            <div class="header-title-block">
+                <h1>ColdWave Dashboard</h1>
+                <p class="tagline">Emergency Operations Center - Government of Bihar</p>
+            </div>
+        </div>
+    """, unsafe_allow_html=True)
 
-    if kpi_ts_df.empty:
-        ts_df = pd.DataFrame(columns=['date', 'affected_forms_filled', 'affected_population_lac', 'death', 'rain_basera', 'alloted_amount_lac', 'expenditure_amount_lac', 'blanket_distributed', 'people_in_rain_basera', 'wood_burn_kg', 'bonfire_places'])
-        ts_df['date'] = pd.to_datetime(ts_df['date'])
-    else:
-        # Aggregation for time series data
-        ts_df = kpi_ts_df.groupby('date', as_index=False).agg({
-            'affected_forms_filled': 'sum',
-            'affected_population_lac': 'sum',
-            'death': 'sum',
-            'rain_basera': 'sum',
-            'expenditure_amount_lac': 'sum',
-            'blanket_distributed': 'sum',
-            'people_in_rain_basera': 'sum',
-            'wood_burn_kg': 'sum',
-            'bonfire_places': 'sum'
-        })
-
-        if 'alloted_amount_lac' in kpi_ts_df.columns and 'district' in kpi_ts_df.columns:
-            alloted_amount_ts = kpi_ts_df.groupby(['date', 'district'])['alloted_amount_lac'].max().reset_index()
-            alloted_amount_ts_daily_sum = alloted_amount_ts.groupby('date')['alloted_amount_lac'].sum().reset_index()
-            ts_df = pd.merge(ts_df, alloted_amount_ts_daily_sum, on='date', how='left')
-            ts_df['alloted_amount_lac'] = ts_df['alloted_amount_lac'].fillna(0)
+    # Creating minimal horizontal layout for filters
+    col1, col2, col3 = st.columns([1, 1, 1.2])
+
+    with col1:
+        selected_district_filter = st.selectbox(
+            "District",
+            options=unique_districts,
+            key="sb_dist_filter",
+            placeholder="Select District",
+            index=None
+        )
+
+    with col2:
+        if selected_district_filter:
+            block_options = list(dims.children_of('district', 'block', selected_district_filter))
         else:
-            ts_df['alloted_amount_lac'] = 0
+            block_options = list(dims.values('block'))
+        selected_block_filter = st.selectbox(
+            "Block",
+            options=block_options,
+            key="sb_block_filter",
+            placeholder="Select Block",
+            index=None
+        )
+
+    with col3:
+        date_input_value = st.date_input(
+            "Select Date Range",
+            value=[default_start_date_filter, default_end_date_filter],
+            min_value=min_date_data,
+            max_value=default_end_date_filter,
+            key="di_date"
+        )
+
+    # Processing date range
+    if len(date_input_value) == 2:
+        start_date_filter_selected, end_date_filter_selected = pd.to_datetime(date_input_value[0]), pd.to_datetime(date_input_value[1])
+        if start_date_filter_selected > end_date_filter_selected:
+            st.error("Error: Start date cannot be after end date. Adjusting range to default.")
+            start_date_filter_selected, end_date_filter_selected = pd.to_datetime(default_start_date_filter), pd.to_datetime(default_end_date_filter)
+        date_range = [start_date_filter_selected, end_date_filter_selected]
+    else: # This handles the case where only one date is selected, which can happen initially
+        date_range = [pd.to_datetime(default_start_date_filter), pd.to_datetime(default_end_date_filter)]
+
+    if df_main.empty:
+        st.error("Dashboard cannot be displayed because no data could be loaded.")
+        st.stop()
+
+    # Applying filters to create `kpi_ts_df` for charts and "Till Now" KPIs (see filter_masks)
+    with tracing.span("filter") as filter_span:
+        start_date_filtered, end_date_filtered = date_range[0], date_range[1]
+        treemap_mask, kpi_mask = filter_masks(df_main, start_date_filtered, end_date_filtered, selected_district_filter, selected_block_filter)
+
+        kpi_ts_df = df_main.loc[kpi_mask, KPI_INPUT_COLS] # This will be used for Time Series charts and 'Till Now' KPIs
+
+        today_kpi_reference_date = date_range[1]
+        filter_span["rows"] = len(kpi_ts_df)
+
+
+    with tracing.span("aggregate") as aggregate_span:
+        kpis = compute_kpis(kpi_ts_df, today_kpi_reference_date.normalize(), allotment_lookup)
+        ts_df = kpis.timeseries
+        aggregate_span["rows"] = len(ts_df)
 
 
     plotly_template="plotly_white"
@@ -605,94 +675,90 @@ div[data-testid="stDateInput"]:hover > div > div {
         with chart_row1_col1:
             st.markdown("###### Affected Population (lac)")
             if not ts_df.empty and 'affected_population_lac' in ts_df.columns:
-                fig = px.line(ts_df, x='date', y='affected_population_lac', color_discrete_sequence=[primary_color])
-                fig.update_traces(mode='lines', line_shape='linear', line=dict(width=1.5), fill='tozeroy', fillcolor=f'rgba(15, 98, 254, {fill_opacity})', name='Population', hovertemplate='%{y:,.2f} lac<extra></extra>')
-                st.plotly_chart(style_chart(fig), use_container_width=True)
+                with tracing.span("figure:population"):
+                    fig = px.line(ts_df, x='date', y='affected_population_lac', color_discrete_sequence=[primary_color])
+                    fig.update_traces(mode='lines', line_shape='linear', line=dict(width=1.5), fill='tozeroy', fillcolor=f'rgba(15, 98, 254, {fill_opacity})', name='Population', hovertemplate='%{y:,.2f} lac<extra></extra>')
+                    fig = style_chart(fig)
+                tracing.emit_chart("population", fig, use_container_width=True, key="population_chart")
             else:
                 st.caption("No data for Population.")
         with chart_row1_col2:
             st.markdown("###### Deaths Reported")
             if not ts_df.empty and 'death' in ts_df.columns:
-                fig = px.bar(ts_df, x='date', y='death', color_discrete_sequence=[death_color])
-                fig.update_traces(name='Deaths', hovertemplate='%{y:,}<extra></extra>', marker_line_width=0)
-                fig.update_layout(bargap=0.6)
-                st.plotly_chart(style_chart(fig), use_container_width=True)
+                with tracing.span("figure:deaths"):
+                    fig = px.bar(ts_df, x='date', y='death', color_discrete_sequence=[death_color])
+                    fig.update_traces(name='Deaths', hovertemplate='%{y:,}<extra></extra>', marker_line_width=0)
+                    fig.update_layout(bargap=0.6)
+                    fig = style_chart(fig)
+                tracing.emit_chart("deaths", fig, use_container_width=True, key="deaths_chart")
             else:
                 st.caption("No data for Deaths.")
         chart_row2_col1, chart_row2_col2 = st.columns(2, gap="medium")
         with chart_row2_col1:
             st.markdown("###### Shelter & Blankets")
             if not ts_df.empty and 'people_in_rain_basera' in ts_df.columns and 'blanket_distributed' in ts_df.columns:
-                fig = go.Figure()
-                fig.add_trace(go.Scatter(x=ts_df['date'], y=ts_df['people_in_rain_basera'], name='People Sheltered', mode='lines', line=dict(color=secondary_color, width=1.5), fill='tozeroy', fillcolor=f'rgba(82, 82, 82, {fill_opacity})', hovertemplate='Sheltered: %{y:,}<extra></extra>'))
-                fig.add_trace(go.Scatter(x=ts_df['date'], y=ts_df['blanket_distributed'], name='Blankets Distributed', mode='lines', line=dict(color=blanket_color, width=1.5, dash='dot'), yaxis='y2', hovertemplate='Blankets: %{y:,}<extra></extra>'))
-                fig = style_chart(fig)
-                fig.update_layout(yaxis=dict(tickfont=dict(color=secondary_color)), yaxis2=dict(title=None, overlaying='y', side='right', showgrid=False, showline=True, linecolor=axis_color, tickfont=dict(color=blanket_color)), legend=dict(y=1.15))
-                st.plotly_chart(fig, use_container_width=True)
+                with tracing.span("figure:shelter"):
+                    fig = go.Figure()
+                    fig.add_trace(go.Scatter(x=ts_df['date'], y=ts_df['people_in_rain_basera'], name='People Sheltered', mode='lines', line=dict(color=secondary_color, width=1.5), fill='tozeroy', fillcolor=f'rgba(82, 82, 82, {fill_opacity})', hovertemplate='Sheltered: %{y:,}<extra></extra>'))
+                    fig.add_trace(go.Scatter(x=ts_df['date'], y=ts_df['blanket_distributed'], name='Blankets Distributed', mode='lines', line=dict(color=blanket_color, width=1.5, dash='dot'), yaxis='y2', hovertemplate='Blankets: %{y:,}<extra></extra>'))
+                    fig = style_chart(fig)
+                    fig.update_layout(yaxis=dict(tickfont=dict(color=secondary_color)), yaxis2=dict(title=None, overlaying='y', side='right', showgrid=False, showline=True, linecolor=axis_color, tickfont=dict(color=blanket_color)), legend=dict(y=1.15))
+                tracing.emit_chart("shelter", fig, use_container_width=True, key="shelter_chart")
             else:
                 st.caption("No data for Shelter & Blankets.")
         with chart_row2_col2:
             st.markdown("###### Financial Overview (Lac)")
             if not ts_df.empty and 'alloted_amount_lac' in ts_df.columns and 'expenditure_amount_lac' in ts_df.columns:
-                fig = px.line(ts_df, x='date', y=['alloted_amount_lac', 'expenditure_amount_lac'], color_discrete_sequence=[primary_color, exp_color])
-                fig.update_traces(mode='lines', line_shape='linear', line=dict(width=1.5), hovertemplate='%{y:,.2f} lac<extra></extra>')
-                fig = style_chart(fig)
-                if len(fig.data) >= 1:
-                    fig.data[0].name = 'Alloted'
-                if len(fig.data) >= 2:
-                    fig.data[1].name = 'Expenditure'
-                st.plotly_chart(fig, use_container_width=True)
+                with tracing.span("figure:financial"):
+                    fig = px.line(ts_df, x='date', y=['alloted_amount_lac', 'expenditure_amount_lac'], color_discrete_sequence=[primary_color, exp_color])
+                    fig.update_traces(mode='lines', line_shape='linear', line=dict(width=1.5), hovertemplate='%{y:,.2f} lac<extra></extra>')
+                    fig = style_chart(fig)
+                    if len(fig.data) >= 1:
+                        fig.data[0].name = 'Alloted'
+                    if len(fig.data) >= 2:
+                        fig.data[1].name = 'Expenditure'
+                tracing.emit_chart("financial", fig, use_container_width=True, key="financial_chart")
             else:
                 st.caption("No data for Financial Overview.")
 
     with main_col2:
         st.markdown("###### District/Block Overview")
-        treemap_input_data = base_filtered_df.copy()
+        with tracing.span("aggregate:treemap") as treemap_span:
+            treemap_input_data = df_main.loc[treemap_mask, TREEMAP_INPUT_COLS]
 
-        # Debug: Checking treemap input data
-        print(f"TREEMAP DEBUG: Input data rows: {len(treemap_input_data)}")
-        if not treemap_input_data.empty:
-            print(f"TREEMAP DEBUG: Affected population sum: {treemap_input_data['affected_population_lac'].sum()}")
-            print(f"TREEMAP DEBUG: Available districts: {treemap_input_data['district'].unique()}")
-
-        if selected_district_filter:
-            print(f"TREEMAP DEBUG: Filtering by district: {selected_district_filter}")
-            treemap_input_data = treemap_input_data[treemap_input_data['district'] == selected_district_filter]
-            print(f"TREEMAP DEBUG: After district filter: {len(treemap_input_data)} rows")
-        if selected_district_filter:
-            if not treemap_input_data.empty:
-                block_level_data = treemap_input_data.groupby(['district', 'block'], as_index=False)['affected_population_lac'].sum()
-                treemap_path = [px.Constant("Filtered Overview"), 'district', 'block']
-                caption_text = "No data for Treemap for the selected block."
-            else:
-                block_level_data = pd.DataFrame()
-                caption_text = "No data for Treemap for the selected district."
-        else:
-            if not treemap_input_data.empty:
-                block_level_data = treemap_input_data.groupby(['district'], as_index=False)['affected_population_lac'].sum()
-                treemap_path = [px.Constant("Filtered Overview"), 'district']
-                caption_text = "No data for Treemap."
+            if selected_district_filter:
+                if not treemap_input_data.empty:
+                    block_level_data = treemap_input_data.groupby(['district', 'block'], as_index=False)['affected_population_lac'].sum()
+                    treemap_path = [px.Constant("Filtered Overview"), 'district', 'block']
+                    caption_text = "No data for Treemap for the selected block."
+                else:
+                    block_level_data = pd.DataFrame()
+                    caption_text = "No data for Treemap for the selected district."
             else:
-                block_level_data = pd.DataFrame()
-                caption_text = "No data for Treemap."
+                if not treemap_input_data.empty:
+                    block_level_data = treemap_input_data.groupby(['district'], as_index=False)['affected_population_lac'].sum()
+                    treemap_path = [px.Constant("Filtered Overview"), 'district']
+                    caption_text = "No data for Treemap."
+                else:
+                    block_level_data = pd.DataFrame()
+                    caption_text = "No data for Treemap."
+            treemap_span["rows"] = len(block_level_data)
         if not block_level_data.empty:
             block_level_data['affected_population_lac'] = pd.to_numeric(block_level_data['affected_population_lac'], errors='coerce').fillna(0)
             block_level_data = block_level_data[block_level_data['affected_population_lac'] >= 0]
 
-            print(f"TREEMAP DEBUG: Final data rows: {len(block_level_data)}")
-            print(f"TREEMAP DEBUG: Final sum: {block_level_data['affected_population_lac'].sum()}")
-
             # Fix: To Check if all values are zero to prevent "weights sum to zero" error
             if block_level_data['affected_population_lac'].sum() > 0:
-                fig_treemap = px.treemap(
-                    block_level_data,
-                    path=treemap_path,
-                    values='affected_population_lac',
-                    color='affected_population_lac',
-                    custom_data=['affected_population_lac'],
-                    color_continuous_scale='Blues',
-                    title=None
-                )
+                with tracing.span("figure:treemap"):
+                    fig_treemap = px.treemap(
+                        block_level_data,
+                        path=treemap_path,
+                        values='affected_population_lac',
+                        color='affected_population_lac',
+                        custom_data=['affected_population_lac'],
+                        color_continuous_scale='Blues',
+                        title=None
+                    )
             else:
                 # If all values are zero, showing message instead of broken chart
                 block_level_data = pd.DataFrame()
@@ -714,37 +780,22 @@ div[data-testid="stDateInput"]:hover > div > div {
                 marker=dict(cornerradius=0, line=dict(color='#B0B0B0', width=0.5), pad=dict(t=2,l=2,r=2,b=2))
             )
             fig_treemap.update_traces(maxdepth=len(treemap_path))
-            st.plotly_chart(fig_treemap, use_container_width=True)
+            tracing.emit_chart("treemap", fig_treemap, use_container_width=True, key="treemap_chart")
         else:
             st.caption(caption_text)
 
-    total_allotment_dashboard = 0
-    if 'alloted_amount_lac' in tillnow_df_for_kpis.columns and 'district' in tillnow_df_for_kpis.columns and not tillnow_df_for_kpis.empty:
-        unique_district_allotments = tillnow_df_for_kpis.groupby('district')['alloted_amount_lac'].max()
-        total_allotment_dashboard = unique_district_allotments.sum()
-    else:
-        total_allotment_dashboard = 0
-
-    total_expenditure_dashboard = tillnow_df_for_kpis['expenditure_amount_lac'].sum() if not tillnow_df_for_kpis.empty else 0
-
-    # For "Today's" Allotment KPI:
-    today_allotment = 0
-    if not today_df.empty and 'district' in today_df.columns and 'alloted_amount_lac' in today_df.columns:
-        today_allotment = today_df.groupby('district')['alloted_amount_lac'].max().sum()
-    today_expenditure = today_df['expenditure_amount_lac'].sum() if not today_df.empty else 0
-
-
+    today, till_now = kpis.today, kpis.till_now
     kpi_data = {
-        "forms": {"title": "Affected/ Form Filled Blocks & Nagar Nikaay", "today": today_df['affected_forms_filled'].sum(), "till_now": tillnow_df_for_kpis['affected_forms_filled'].sum(), "is_lac": False},
-        "population": {"title": "AFFECTED POPULATION", "today": today_df['affected_population_lac'].sum(), "till_now": tillnow_df_for_kpis['affected_population_lac'].sum(), "is_lac": True},
-        "basera": {"title": "NO. OF RAIN BASERA", "today": today_df['rain_basera'].sum(), "till_now": tillnow_df_for_kpis['rain_basera'].sum(), "is_lac": False},
-        "deaths": {"title": "NO OF DEATHS", "today": today_df['death'].sum(), "till_now": tillnow_df_for_kpis['death'].sum(), "is_lac": False},
-        "people_basera": {"title": "NO. OF PEOPLE IN RAIN BASERA", "today": today_df['people_in_rain_basera'].sum(), "till_now": tillnow_df_for_kpis['people_in_rain_basera'].sum(), "is_lac": False},
-        "blankets": {"title": "BLANKETS DISTRIBUTED", "today": today_df['blanket_distributed'].sum(), "till_now": tillnow_df_for_kpis['blanket_distributed'].sum(), "is_lac": False},
-        "wood": {"title": "TOTAL WOOD BURN (IN KG)", "today": today_df['wood_burn_kg'].sum(), "till_now": tillnow_df_for_kpis['wood_burn_kg'].sum(), "is_lac": False},
-        "bonfires": {"title": "NO. OF BONFIRE PLACES", "today": today_df['bonfire_places'].sum(), "till_now": tillnow_df_for_kpis['bonfire_places'].sum(), "is_lac": False},
-        "allotment": {"today": today_allotment, "till_now": total_allotment_dashboard},
-        "expenditure": {"today": today_expenditure, "till_now": total_expenditure_dashboard},
+        "forms": {"title": "Affected/ Form Filled Blocks & Nagar Nikaay", "today": today['affected_forms_filled'], "till_now": till_now['affected_forms_filled'], "is_lac": False},
+        "population": {"title": "AFFECTED POPULATION", "today": today['affected_population_lac'], "till_now": till_now['affected_population_lac'], "is_lac": True},
+        "basera": {"title": "NO. OF RAIN BASERA", "today": today['rain_basera'], "till_now": till_now['rain_basera'], "is_lac": False},
+        "deaths": {"title": "NO OF DEATHS", "today": today['death'], "till_now": till_now['death'], "is_lac": False},
+        "people_basera": {"title": "NO. OF PEOPLE IN RAIN BASERA", "today": today['people_in_rain_basera'], "till_now": till_now['people_in_rain_basera'], "is_lac": False},
+        "blankets": {"title": "BLANKETS DISTRIBUTED", "today": today['blanket_distributed'], "till_now": till_now['blanket_distributed'], "is_lac": False},
+        "wood": {"title": "TOTAL WOOD BURN (IN KG)", "today": today['wood_burn_kg'], "till_now": till_now['wood_burn_kg'], "is_lac": False},
+        "bonfires": {"title": "NO. OF BONFIRE PLACES", "today": today['bonfire_places'], "till_now": till_now['bonfire_places'], "is_lac": False},
+        "allotment": {"today": today['alloted_amount_lac'], "till_now": till_now['alloted_amount_lac']},
+        "expenditure": {"today": today['expenditure_amount_lac'], "till_now": till_now['expenditure_amount_lac']},
     }
 
     st.markdown("---")
@@ -6,21 +6,20 @@ import plotly.graph_objects as go
 from PIL import Image
 import base64
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import time
 
-def run():
-    import pandas as pd  
-    from datetime import datetime, timedelta 
-    try:
-        from streamlit_plotly_events import plotly_events
-        PLOTLY_EVENTS_AVAILABLE = True
-    except ImportError:
-        PLOTLY_EVENTS_AVAILABLE = False
+import aggregations
+import caches
+import datastore
+import dimensions
+import fiscal_calendar
+import indexes
+import theme
+import tracing
 
-    # Page Configuration is being handled by main.py
-
-    st.markdown("""
+DASHBOARD_CSS = """
 <style>
     @keyframes fadeIn {
         0% { opacity: 0; transform: translateY(15px) scale(0.98); }
@@ -508,43 +507,202 @@ def run():
     .footer-title { color: #ffc107 !important; font-size: 1rem !important; margin-bottom: 0.5rem !important; }
     .footer-card p { margin-bottom: 0.25rem; font-size: 0.75rem;}
 </style>
-<script>
-document.addEventListener('DOMContentLoaded', function() {
-    let resizeTimeout;
-
-    // Function to trigger Plotly resize
-    function resizePlotlyCharts() {
-        const plotlyCharts = document.querySelectorAll('.js-plotly-plot');
-        plotlyCharts.forEach(chart => {
-            if (window.Plotly && chart._fullLayout) {
-                window.Plotly.Plots.resize(chart);
-            }
-        });
-    }
+"""
 
-    // Monitor for sidebar state changes
-    const observer = new MutationObserver(function(mutations) {
-        mutations.forEach(function(mutation) {
-            if (mutation.type === 'attributes' &&
-                (mutation.attributeName === 'class' || mutation.attributeName === 'style')) {
-                clearTimeout(resizeTimeout);
-                resizeTimeout = setTimeout(resizePlotlyCharts, 100);
-            }
-        });
-    });
+# Database Connection
+@st.cache_resource
+def init_db_connection():
+    """Establishes a SQLAlchemy engine connection to the SQL Server database using Dashboard2.toml config."""
+    try:
+        from sqlalchemy import create_engine
+        import os
+
+        config_path = os.path.join(".streamlit", "Dashboard2.toml")
+        if os.path.exists(config_path):
+            # Read the TOML file manually since it's simple
+            config = {}
+            with open(config_path, 'r') as f:
+                content = f.read()
+
+            # Simple TOML parsing for our specific format
+            for line in content.split('\n'):
+                if '=' in line and not line.strip().startswith('#'):
+                    key, value = line.split('=', 1)
+                    config[key.strip()] = value.strip().strip('"')
+
+            # Extract connection details from .toml file
+            if 'url' in config:
+                # If using URL format from .toml (current Dashboard2.toml format)
+                connection_url = config['url']
+            else:
+                # If using separate parameters (fallback for different format)
+                server = config.get('db_server', 'localhost')
+                database = config.get('db_database', 'eoc')
+                connection_url = f"mssql+pyodbc://{server}/{database}?driver=ODBC+Driver+17+for+SQL+Server&trusted_connection=yes&TrustServerCertificate=yes"
+        else:
+            # Fallback connection string only if .toml doesn't exist
+            st.error("Dashboard2.toml file not found in .streamlit folder. Please ensure the configuration file exists.")
+            return None
 
-    const sidebar = document.querySelector('[data-testid="stSidebar"]');
-    if (sidebar) {
-        observer.observe(sidebar, { attributes: true, subtree: true });
-    }
+        # Add connection pooling for better performance
+        engine = create_engine(
+            connection_url,
+            pool_size=5,
+            max_overflow=10,
+            pool_pre_ping=True,
+            pool_recycle=3600
+        )
+        return engine
+    except Exception as e:
+        st.error(f"Database connection failed. Check `Dashboard2.toml` and ensure DB is running. Error: {e}")
+        return None
+
+# Calendar years before the current one held in memory; older years load on demand (see load_incident_year)
+INCIDENT_HISTORY_YEARS = 5
+# Partition reads in flight at once; stays within the engine's default connection pool (5 + overflow)
+MAX_PARALLEL_READS = 6
+
+INCIDENTS_QUERY = """
+SELECT
+    CAST(HR.IncidentDate AS DATE) AS date,
+    TRIM(MD.DistrictName) AS district,
+    TRIM(MB.BlockName) AS block,
+    H.Name AS incident_type,
+    COALESCE(SUM(CASE WHEN HLR.HLCode = 2 THEN 1 ELSE 0 END), 0) AS deaths, -- Corrected: HLCode = 2 for Deaths
+    COALESCE(SUM(CASE WHEN HLR.HLCode = 1 THEN 1 ELSE 0 END), 0) AS injured, -- Corrected: HLCode = 1 for Injured
+    CASE
+        WHEN HR.IsFinal = 1 THEN 'Final'
+        WHEN HR.IsFinal = 2 THEN 'Verified'
+        ELSE 'Unknown'
+    END AS entry_type
+FROM
+    dbo.HazardReport AS HR
+LEFT JOIN
+    dbo.Hazards AS H ON HR.HazardCode = H.ID
+LEFT JOIN
+    dbo.mst_Districts AS MD ON HR.DistrictCode = MD.DistrictCode
+LEFT JOIN
+    dbo.mst_Blocks AS MB ON HR.BlockCode = MB.BlockCode AND HR.DistrictCode = MB.DistrictCode
+LEFT JOIN
+    dbo.HumanLossReport AS HLR ON HR.ID = HLR.HzdReptID
+WHERE
+    HR.IncidentDate >= ? AND HR.IncidentDate < ?
+GROUP BY
+    CAST(HR.IncidentDate AS DATE),
+    TRIM(MD.DistrictName),
+    TRIM(MB.BlockName),
+    H.Name,
+    HR.IsFinal;
+"""
+
+def year_partitions(start, end):
+    """Splits [start, end) at every 1 January into (start, end) pairs."""
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    bounds = [start] + [pd.Timestamp(year, 1, 1) for year in range(start.year + 1, end.year + 1)]
+    bounds = [b for b in bounds if b < end] + [end]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def fetch_incidents(engine, start, end):
+    """Reads incidents dated in [start, end), one query per calendar year, run concurrently.
+
+    Each query groups by day, so no group spans two partitions and the results just concatenate.
+    """
+    partitions = year_partitions(start, end)
+    if not partitions:
+        return pd.DataFrame()
+
+    def read_partition(bounds):
+        return pd.read_sql(INCIDENTS_QUERY, engine, params=(bounds[0].to_pydatetime(), bounds[1].to_pydatetime()))
+
+    with ThreadPoolExecutor(max_workers=min(len(partitions), MAX_PARALLEL_READS), thread_name_prefix="eoc-incidents") as pool:
+        frames = list(pool.map(read_partition, partitions))
+    return pd.concat(frames, ignore_index=True)
+
+def prepare_incidents(df):
+    """Cleans a raw incidents frame and puts it in date order with the calendar columns."""
+    # Highly optimized data processing - vectorized operations
+    df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d', errors='coerce')
+
+    # Vectorized string processing - much faster
+    string_cols = ['district', 'block', 'incident_type', 'entry_type']
+    df[string_cols] = df[string_cols].astype(str).apply(lambda x: x.str.strip().str.title())
+
+    # Vectorized numeric processing
+    numeric_cols = ['deaths', 'injured']
+    df[numeric_cols] = df[numeric_cols].apply(pd.to_numeric, errors='coerce').fillna(0).astype('int16')
+
+    # Remove any duplicate rows to reduce memory. Rows are kept in date order so a date
+    # range is a contiguous block of rows (see get_filtered_rows)
+    df = df.drop_duplicates().sort_values('date', kind='stable').reset_index(drop=True)
+    fiscal_calendar.add_calendar_columns(df, 'date')
+    return df
+
+# Data Loading - shared across sessions through datastore (see INCIDENTS below)
+def load_data_from_db():
+    try:
+        engine = init_db_connection()
+        if not engine:
+            return pd.DataFrame()
 
-    window.addEventListener('resize', function() {
-        clearTimeout(resizeTimeout);
-        resizeTimeout = setTimeout(resizePlotlyCharts, 100);
-    });
-});
-</script>
-    """, unsafe_allow_html=True)
+        today = pd.Timestamp.today().normalize()
+        df = fetch_incidents(engine, pd.Timestamp(first_loaded_year(today), 1, 1), today + pd.Timedelta(days=1))
+
+        if df.empty:
+            return pd.DataFrame()
+
+        return prepare_incidents(df)
+
+    except Exception as e:
+        st.error(f"An error occurred while loading data: {e}. Please ensure:")
+        st.error("- Your `.streamlit/Dashboard2.toml` file includes the correct server and database configuration.")
+        st.error("- The database server is accessible and the ODBC Driver 17 for SQL Server is installed.")
+        return pd.DataFrame()
+
+def first_loaded_year(today):
+    """First calendar year of the in-memory incident history."""
+    return today.year - INCIDENT_HISTORY_YEARS
+
+def load_incident_year(year):
+    """Incidents of one calendar year before the in-memory history, loaded when a date range reaches it.
+
+    Raises on failure instead of returning an empty frame, so a failed read is not cached as a year
+    without incidents.
+    """
+    engine = init_db_connection()
+    if not engine:
+        raise RuntimeError("no database connection")
+    df = fetch_incidents(engine, pd.Timestamp(year, 1, 1), pd.Timestamp(year + 1, 1, 1))
+    return prepare_incidents(df) if not df.empty else df
+
+def load_history_start():
+    """Date of the earliest incident on record, which bounds the date picker."""
+    try:
+        engine = init_db_connection()
+        if not engine:
+            return pd.DataFrame()
+        df = pd.read_sql("SELECT MIN(CAST(IncidentDate AS DATE)) AS min_date FROM dbo.HazardReport", engine)
+        df['min_date'] = pd.to_datetime(df['min_date'], errors='coerce')
+        return df.dropna()
+    except Exception as e:
+        print(f"Could not read the earliest incident date: {e}")
+        return pd.DataFrame()
+
+INCIDENTS = datastore.DatasetSpec("incidents", load_data_from_db, ttl=1800)
+HISTORY_START = datastore.DatasetSpec("incidents.history_start", load_history_start, ttl=6 * 3600)
+DATASETS = [INCIDENTS, HISTORY_START]
+
+def run():
+    import pandas as pd  
+    from datetime import datetime, timedelta 
+    try:
+        from streamlit_plotly_events import plotly_events
+        PLOTLY_EVENTS_AVAILABLE = True
+    except ImportError:
+        PLOTLY_EVENTS_AVAILABLE = False
+
+    # Page Configuration is being handled by main.py
+
+    theme.apply_theme("dashboard2", DASHBOARD_CSS)
 
     PRIMARY_COLOR = "#0F62FE"
     SECONDARY_COLOR = "#525252"
@@ -558,7 +716,7 @@ document.addEventListener('DOMContentLoaded', function() {
     CHART_FONT = "IBM Plex Sans, sans-serif"
 
     # Image to base64 conversion function
-    @st.cache_data
+    @caches.governed_cache("images", max_entries=16)
     def get_image_as_base64(path):
         try:
             with open(path, "rb") as image_file:
@@ -571,144 +729,86 @@ document.addEventListener('DOMContentLoaded', function() {
             st.warning(f"Image file not found at path: '{path}'. Please ensure it is in the correct directory.")
             return "data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7"
 
-    # Database Connection
-    @st.cache_resource
-    def init_db_connection():
-        """Establishes a SQLAlchemy engine connection to the SQL Server database using Dashboard2.toml config."""
-        try:
-            from sqlalchemy import create_engine
-            import os
-
-            config_path = os.path.join(".streamlit", "Dashboard2.toml")
-            if os.path.exists(config_path):
-                # Read the TOML file manually since it's simple
-                config = {}
-                with open(config_path, 'r') as f:
-                    content = f.read()
-
-                # Simple TOML parsing for our specific format
-                for line in content.split('\n'):
-                    if '=' in line and not line.strip().startswith('#'):
-                        key, value = line.split('=', 1)
-                        config[key.strip()] = value.strip().strip('"')
-
-                # Extract connection details from .toml file
-                if 'url' in config:
-                    # If using URL format from .toml (current Dashboard2.toml format)
-                    connection_url = config['url']
-                else:
-                    # If using separate parameters (fallback for different format)
-                    server = config.get('db_server', 'localhost')
-                    database = config.get('db_database', 'eoc')
-                    connection_url = f"mssql+pyodbc://{server}/{database}?driver=ODBC+Driver+17+for+SQL+Server&trusted_connection=yes&TrustServerCertificate=yes"
-            else:
-                # Fallback connection string only if .toml doesn't exist
-                st.error("Dashboard2.toml file not found in .streamlit folder. Please ensure the configuration file exists.")
-                return None
-
-            # Add connection pooling for better performance
-            engine = create_engine(
-                connection_url,
-                pool_size=5,
-                max_overflow=10,
-                pool_pre_ping=True,
-                pool_recycle=3600
-            )
-            return engine
-        except Exception as e:
-            st.error(f"Database connection failed. Check `Dashboard2.toml` and ensure DB is running. Error: {e}")
-            return None
-
-    # Data Loading - Extended cache for better performance
-    @st.cache_data(ttl=1800)  # 30 minutes
-    def load_data_from_db():
-        try:
-            engine = init_db_connection()
-            if not engine:
-                return pd.DataFrame()
-
-            sql_query = """
-            SELECT
-                CAST(HR.IncidentDate AS DATE) AS date,
-                TRIM(MD.DistrictName) AS district,
-                TRIM(MB.BlockName) AS block,
-                H.Name AS incident_type,
-                COALESCE(SUM(CASE WHEN HLR.HLCode = 2 THEN 1 ELSE 0 END), 0) AS deaths, -- Corrected: HLCode = 2 for Deaths
-                COALESCE(SUM(CASE WHEN HLR.HLCode = 1 THEN 1 ELSE 0 END), 0) AS injured, -- Corrected: HLCode = 1 for Injured
-                CASE
-                    WHEN HR.IsFinal = 1 THEN 'Final'
-                    WHEN HR.IsFinal = 2 THEN 'Verified'
-                    ELSE 'Unknown'
-                END AS entry_type
-            FROM
-                dbo.HazardReport AS HR
-            LEFT JOIN
-                dbo.Hazards AS H ON HR.HazardCode = H.ID
-            LEFT JOIN
-                dbo.mst_Districts AS MD ON HR.DistrictCode = MD.DistrictCode
-            LEFT JOIN
-                dbo.mst_Blocks AS MB ON HR.BlockCode = MB.BlockCode AND HR.DistrictCode = MB.DistrictCode
-            LEFT JOIN
-                dbo.HumanLossReport AS HLR ON HR.ID = HLR.HzdReptID
-            WHERE
-                HR.IncidentDate >= DATEADD(YEAR, -5, GETDATE())  -- Last 5 years only for faster loading
-            GROUP BY
-                CAST(HR.IncidentDate AS DATE),
-                TRIM(MD.DistrictName),
-                TRIM(MB.BlockName),
-                H.Name,
-                HR.IsFinal
-            ORDER BY
-                CAST(HR.IncidentDate AS DATE);
-            """
-
-            df = pd.read_sql(sql_query, engine)
-
-            if df.empty:
-                return pd.DataFrame()
-
-            # Highly optimized data processing - vectorized operations
-            df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d', errors='coerce')
-
-            # Vectorized string processing - much faster
-            string_cols = ['district', 'block', 'incident_type', 'entry_type']
-            df[string_cols] = df[string_cols].astype(str).apply(lambda x: x.str.strip().str.title())
-
-            # Vectorized numeric processing
-            numeric_cols = ['deaths', 'injured']
-            df[numeric_cols] = df[numeric_cols].apply(pd.to_numeric, errors='coerce').fillna(0).astype('int16')
-
-            # Remove any duplicate rows to reduce memory
-            df = df.drop_duplicates().reset_index(drop=True)
-
-            return df
-
-        except Exception as e:
-            st.error(f"An error occurred while loading data: {e}. Please ensure:")
-            st.error("- Your `.streamlit/Dashboard2.toml` file includes the correct server and database configuration.")
-            st.error("- The database server is accessible and the ODBC Driver 17 for SQL Server is installed.")
-            return pd.DataFrame()
+    def build_incident_dimensions(df):
+        return dimensions.build_dimensions(df, ['district', 'entry_type', 'incident_type'])
+
+    # Incident types as displayed; get_filtered_data applies the same renaming to its result
+    INCIDENT_TYPE_RENAMES = {'Strong Wind (Andhi Toofan)': 'Strong Wind'}
+
+    def build_incident_indexes(df):
+        index = indexes.build_indexes(df, ['district', 'block', 'incident_type', 'entry_type'])
+        index['incident_type_display'] = indexes.build_category_index(df['incident_type'].replace(INCIDENT_TYPE_RENAMES))
+        return index
+
+    def dimension_codes(df, columns):
+        """Precomputed codes of `columns` for aggregations.aggregate. Filtered frames keep the
+        dataset's row positions as their index, so the rows can be looked up in its indexes."""
+        index = dataset.derive("category_index", build_incident_indexes)
+        rows = df.index.to_numpy()
+        return {col: index['incident_type_display' if col == 'incident_type' else col].encode(rows) for col in columns}
+
+    # Years older than the in-memory history, one cache entry per year. Past years rarely change,
+    # and the governed cache's LRU and byte budget decide how many stay resident.
+    @caches.governed_cache("incidents.years", max_entries=8, ttl=6 * 3600)
+    def get_incident_year(year):
+        return load_incident_year(year)
+
+    # The in-memory history extended back to `first_year`: the missing years are read concurrently
+    # (years already cached are not read again) and put in front of the in-memory rows. The result
+    # is a dataset of its own, so it gets its own indexes and filter cache entries.
+    @caches.governed_cache("incidents.extended", max_entries=2, ttl=1800)
+    def get_extended_dataset(_dataset, dataset_key, first_year):
+        years = list(range(first_year, first_loaded_year(pd.Timestamp.fromtimestamp(_dataset.loaded_at))))
+        with ThreadPoolExecutor(max_workers=max(1, min(len(years), MAX_PARALLEL_READS)), thread_name_prefix="eoc-history") as pool:
+            frames = [df for df in pool.map(get_incident_year, years) if not df.empty]
+        # Each year is date-sorted and the years are in order, so the concatenation is date-sorted too
+        df = pd.concat(frames + [_dataset.frame], ignore_index=True)
+        return datastore.SharedDataset(f"{_dataset.name}.from_{first_year}", _dataset.version, datastore.freeze_frame(df), _dataset.loaded_at)
+
+    def dataset_cache_key(ds):
+        """Stands in for a dataset's frame in cache keys. An extended dataset keeps the in-memory
+        version while its rows depend on which older years were read, so the row count is part
+        of the key: filter results never outlive the rows they index."""
+        return (ds.name, ds.version, len(ds.frame))
+
+    # Row positions matching a filter prefix. Each level (date range, + district, + entry type,
+    # + incident type) is cached under its own key and built from the level above it, so changing
+    # a downstream filter only narrows the cached upstream rows instead of rescanning the frame.
+    # The frame is sorted by date, so the date range is a row range and the categorical levels are
+    # intersections with the dataset's posting lists.
+    @caches.governed_cache("incidents.rows", max_entries=256, ttl=1800)
+    def get_filtered_rows(_dataset, dataset_key, start_date, end_date, district='All', entry_type='All', incident_type='All'):
+        index = _dataset.derive("category_index", build_incident_indexes)
+        if incident_type != 'All':
+            rows = get_filtered_rows(_dataset, dataset_key, start_date, end_date, district, entry_type)
+            return indexes.intersect(rows, index['incident_type'].rows(incident_type))
+        if entry_type != 'All':
+            rows = get_filtered_rows(_dataset, dataset_key, start_date, end_date, district)
+            return indexes.intersect(rows, index['entry_type'].rows(entry_type))
+        lo, hi = indexes.date_bounds(_dataset.frame['date'].to_numpy(), start_date, end_date)
+        if district != 'All':
+            return indexes.clip_rows(index['district'].rows(district), lo, hi)
+        return np.arange(lo, hi)
 
     # Cache filtered data to avoid repeated processing
-    @st.cache_data
-    def get_filtered_data(df, start_date, end_date, district, entry_type, incident_type):
+    # dataset_cache_key stands in for the frame in the cache key, so the frame is never hashed
+    @caches.governed_cache("incidents.filtered", max_entries=64, ttl=1800)
+    def get_filtered_data(_dataset, dataset_key, start_date, end_date, district, entry_type, incident_type):
         """Cache filtered data based on filter selections"""
-        df_filtered = df[(df['date'] >= start_date) & (df['date'] <= end_date)].copy()
-        if district != 'All':
-            df_filtered = df_filtered[df_filtered['district'] == district]
-        if entry_type != 'All':
-            df_filtered = df_filtered[df_filtered['entry_type'] == entry_type]
-        if incident_type != 'All':
-            df_filtered = df_filtered[df_filtered['incident_type'] == incident_type]
+        rows = get_filtered_rows(_dataset, dataset_key, start_date, end_date, district, entry_type, incident_type)
+        df_filtered = _dataset.frame.take(rows)
 
         # Apply incident type replacement
         if 'incident_type' in df_filtered.columns:
-            df_filtered['incident_type'] = df_filtered['incident_type'].replace('Strong Wind (Andhi Toofan)', 'Strong Wind')
+            df_filtered['incident_type'] = df_filtered['incident_type'].replace(INCIDENT_TYPE_RENAMES)
 
         return df_filtered
 
     with st.spinner('Presenting the Disaster Incident Dashboard for you... Thank you for your Patience'):
-        df_main = load_data_from_db()
+        with tracing.span("load") as load_span:
+            dataset = INCIDENTS.get()
+            df_main = dataset.view()
+            load_span["rows"] = len(df_main)
     if df_main.empty:
         st.error("🚨 Unable to load incident data. Please check database connection and try again.")
         st.info("💡 Ensure your database server is running and accessible.")
@@ -727,7 +827,12 @@ document.addEventListener('DOMContentLoaded', function() {
         </div>
     """, unsafe_allow_html=True)
 
+    # The picker reaches back to the earliest incident on record; years before the in-memory
+    # history are loaded when the selected range needs them
+    history_start = HISTORY_START.get().frame
     min_date_data = df_main['date'].min().date()
+    if not history_start.empty:
+        min_date_data = min(min_date_data, history_start['min_date'].iloc[0].date())
     max_date_data = df_main['date'].max().date()
 
     default_start_date_filter = datetime(2021, 1, 1).date()
@@ -738,6 +843,8 @@ document.addEventListener('DOMContentLoaded', function() {
     if default_end_date_filter > max_date_data:
         default_end_date_filter = max_date_data
 
+    dims = dataset.derive("dimensions", build_incident_dimensions)
+
     col1, col2, col3, col4 = st.columns([1.2, 1, 1, 1])
 
     with col1:
@@ -752,21 +859,21 @@ document.addEventListener('DOMContentLoaded', function() {
     with col2:
         selected_district = st.selectbox(
             "Select District",
-            ['All'] + sorted(list(df_main['district'].unique())),
+            ['All'] + list(dims.values('district')),
             key="district_filter_sidebar"
         )
 
     with col3:
         selected_entry_type = st.selectbox(
             "Select Entry Type",
-            ['All'] + sorted(list(df_main['entry_type'].unique())),
+            ['All'] + list(dims.values('entry_type')),
             key="entry_type_filter_sidebar"
         )
 
     with col4:
         selected_incident_type = st.selectbox(
             "Select Incident Type",
-            ['All'] + sorted(list(df_main['incident_type'].unique())),
+            ['All'] + list(dims.values('incident_type')),
             key="incident_type_filter_sidebar"
         )
 
@@ -780,14 +887,27 @@ document.addEventListener('DOMContentLoaded', function() {
         st.error("Error: Start date cannot be after end date. Please adjust the date range.")
         st.stop()
 
+    first_year = first_loaded_year(pd.Timestamp.fromtimestamp(dataset.loaded_at))
+    if start_date.year < first_year:
+        with st.spinner(f'Loading incidents from {start_date.year} to {first_year - 1}...'):
+            with tracing.span("load:history") as history_span:
+                try:
+                    dataset = get_extended_dataset(dataset, dataset_cache_key(dataset), start_date.year)
+                    df_main = dataset.view()
+                except Exception as e:
+                    st.warning(f"Could not load incidents before {first_year}: {e}. Showing data from {first_year} onwards.")
+                history_span["rows"] = len(df_main)
+
     # Use cached filtering for better performance
-    df_filtered = get_filtered_data(df_main, start_date, end_date, selected_district, selected_entry_type, selected_incident_type)
+    with tracing.span("filter") as filter_span:
+        df_filtered = get_filtered_data(dataset, dataset_cache_key(dataset), start_date, end_date, selected_district, selected_entry_type, selected_incident_type)
+        filter_span["rows"] = len(df_filtered)
 
     total_incidents = len(df_filtered)
     total_deaths = df_filtered['deaths'].sum() if 'deaths' in df_filtered else 0
     total_injured = df_filtered['injured'].sum() if 'injured' in df_filtered else 0
 
-    @st.cache_data
+    @caches.governed_cache("incidents.gauges", max_entries=96)
     def create_plotly_gauge_figure(value, title_text, color, max_value):
         fig = go.Figure()
         fig.add_trace(go.Indicator(
@@ -828,20 +948,21 @@ document.addEventListener('DOMContentLoaded', function() {
     DEATHS_GAUGE_MAX = max(10, total_deaths + int(total_deaths*0.5) + 5) if total_deaths > 0 else 10
     INJURED_GAUGE_MAX = max(10, total_injured + int(total_injured*0.5) + 5) if total_injured > 0 else 10
 
-    gauge_key_base = f"{total_incidents}_{total_deaths}_{total_injured}_{start_date.strftime('%Y%m%d')}_{end_date.strftime('%Y%m%d')}_{selected_district}_{selected_entry_type}_{selected_incident_type}"
-
     with st.markdown('<div class="gauge-overall-container">', unsafe_allow_html=True):
         kpi_col1, kpi_col2, kpi_col3 = st.columns(3)
 
         with kpi_col1:
-            fig_incidents = create_plotly_gauge_figure(total_incidents, "Incidents", INCIDENT_COLOR, INCIDENTS_GAUGE_MAX)
-            st.plotly_chart(fig_incidents, use_container_width=True, config={'displayModeBar': False}, key=f"incidents_chart_{gauge_key_base}")
+            with tracing.span("figure:incidents_gauge"):
+                fig_incidents = create_plotly_gauge_figure(total_incidents, "Incidents", INCIDENT_COLOR, INCIDENTS_GAUGE_MAX)
+            tracing.emit_chart("incidents_gauge", fig_incidents, use_container_width=True, config={'displayModeBar': False}, key="incidents_chart")
         with kpi_col2:
-            fig_deaths = create_plotly_gauge_figure(total_deaths, "Deaths", DEATH_COLOR, DEATHS_GAUGE_MAX)
-            st.plotly_chart(fig_deaths, use_container_width=True, config={'displayModeBar': False}, key=f"deaths_chart_{gauge_key_base}")
+            with tracing.span("figure:deaths_gauge"):
+                fig_deaths = create_plotly_gauge_figure(total_deaths, "Deaths", DEATH_COLOR, DEATHS_GAUGE_MAX)
+            tracing.emit_chart("deaths_gauge", fig_deaths, use_container_width=True, config={'displayModeBar': False}, key="deaths_chart")
         with kpi_col3:
-            fig_injured = create_plotly_gauge_figure(total_injured, "Injured", INJURED_COLOR, INJURED_GAUGE_MAX)
-            st.plotly_chart(fig_injured, use_container_width=True, config={'displayModeBar': False}, key=f"injured_chart_{gauge_key_base}")
+            with tracing.span("figure:injured_gauge"):
+                fig_injured = create_plotly_gauge_figure(total_injured, "Injured", INJURED_COLOR, INJURED_GAUGE_MAX)
+            tracing.emit_chart("injured_gauge", fig_injured, use_container_width=True, config={'displayModeBar': False}, key="injured_chart")
 
 
 
@@ -897,7 +1018,12 @@ document.addEventListener('DOMContentLoaded', function() {
     with graph_col1:
         st.markdown('<h3 class="section-title">Casualties</h3>', unsafe_allow_html=True)
         if not df_filtered.empty and 'deaths' in df_filtered.columns and 'incident_type' in df_filtered.columns:
-            incident_deaths_summary = df_filtered[df_filtered['deaths'] > 0].groupby('incident_type')['deaths'].sum().sort_values(ascending=False).reset_index()
+            with tracing.span("aggregate:casualties") as casualties_span:
+                df_with_deaths = df_filtered[df_filtered['deaths'] > 0]
+                incident_deaths_summary = aggregations.aggregate(
+                    df_with_deaths, 'incident_type', sums=['deaths'], codes=dimension_codes(df_with_deaths, ['incident_type'])
+                )['deaths'].sort_values(ascending=False).reset_index()
+                casualties_span["rows"] = len(incident_deaths_summary)
 
             st.markdown('<div class="incident-summary-wrapper-container">', unsafe_allow_html=True)
             incident_cards_container = st.container(border=True)
@@ -945,10 +1071,11 @@ document.addEventListener('DOMContentLoaded', function() {
             selected_month = end_date.month
             selected_year = end_date.year
 
-            month_data = df_filtered[
-                (df_filtered['date'].dt.month == selected_month) &
-                (df_filtered['date'].dt.year == selected_year)
-            ].copy()
+            with tracing.span("aggregate:daily_deaths"):
+                month_data = df_filtered[
+                    (df_filtered['month'] == selected_month) &
+                    (df_filtered['year'] == selected_year)
+                ]
 
             if not month_data.empty and month_data['deaths'].sum() > 0:
                 daily_deaths = month_data.groupby('date')['deaths'].sum().reset_index()
@@ -1036,7 +1163,7 @@ document.addEventListener('DOMContentLoaded', function() {
 
             with chart_col1:
                     st.markdown('<div class="daily-deaths-chart-container">', unsafe_allow_html=True)
-                    st.plotly_chart(fig_daily_deaths, use_container_width=True, config={'displayModeBar': False}, key=f"daily_deaths_chart_{selected_month}_{selected_year}")
+                    tracing.emit_chart("daily_deaths", fig_daily_deaths, use_container_width=True, config={'displayModeBar': False}, key="daily_deaths_chart")
                     st.markdown('</div>', unsafe_allow_html=True)
 
             with chart_col2:
@@ -1047,13 +1174,13 @@ document.addEventListener('DOMContentLoaded', function() {
                             if selected_incident_type and selected_incident_type != 'All':
                                 selected_incident = selected_incident_type
                                 yearly_incident_data = df_main[
-                                    (df_main['date'].dt.year == selected_year) &
+                                    (df_main['year'] == selected_year) &
                                     (df_main['incident_type'] == selected_incident)
-                                ].copy()
+                                ]
                             else:
                                 yearly_incident_data = df_main[
-                                    df_main['date'].dt.year == selected_year
-                                ].copy()
+                                    df_main['year'] == selected_year
+                                ]
                                 selected_incident = "All Incidents"
 
                             # Creating complete month range for the year (Jan to Dec)
@@ -1067,8 +1194,8 @@ document.addEventListener('DOMContentLoaded', function() {
                             monthly_deaths = pd.DataFrame(all_months)
 
                             if not yearly_incident_data.empty:
-                                yearly_incident_data['month'] = yearly_incident_data['date'].dt.month
-                                actual_monthly_deaths = yearly_incident_data.groupby('month')['deaths'].sum().reset_index()
+                                with tracing.span("aggregate:monthly_deaths"):
+                                    actual_monthly_deaths = yearly_incident_data.groupby('month')['deaths'].sum().reset_index()
 
                                 for _, row in actual_monthly_deaths.iterrows():
                                     monthly_deaths.loc[monthly_deaths['month'] == row['month'], 'deaths'] = row['deaths']
@@ -1146,7 +1273,7 @@ document.addEventListener('DOMContentLoaded', function() {
 
                                 # Displaying the monthly deaths column chart
                                 st.markdown('<div class="daily-deaths-chart-container">', unsafe_allow_html=True)
-                                st.plotly_chart(fig_monthly_deaths, use_container_width=True, config={'displayModeBar': False}, key=f"monthly_deaths_chart_{selected_incident}_{selected_year}")
+                                tracing.emit_chart("monthly_deaths", fig_monthly_deaths, use_container_width=True, config={'displayModeBar': False}, key="monthly_deaths_chart")
                                 st.markdown('</div>', unsafe_allow_html=True)
                         else:
                             import calendar
@@ -1207,7 +1334,7 @@ document.addEventListener('DOMContentLoaded', function() {
 
                             # Monthly deaths column chart
                             st.markdown('<div class="daily-deaths-chart-container">', unsafe_allow_html=True)
-                            st.plotly_chart(fig_monthly_deaths, use_container_width=True, config={'displayModeBar': False}, key=f"monthly_deaths_chart_{selected_incident}_{selected_year}")
+                            tracing.emit_chart("monthly_deaths", fig_monthly_deaths, use_container_width=True, config={'displayModeBar': False}, key="monthly_deaths_chart")
                             st.markdown('</div>', unsafe_allow_html=True)
                     except Exception as e:
                         st.error(f"Could not render 'Monthly Deaths by Selected Incident' chart: {e}")
@@ -1219,8 +1346,13 @@ document.addEventListener('DOMContentLoaded', function() {
         st.markdown('<h3 class="section-title">Casualties(%) by Incidents</h3>', unsafe_allow_html=True)
         try:
             if not df_filtered.empty and 'deaths' in df_filtered.columns and 'incident_type' in df_filtered.columns and df_filtered['deaths'].sum() > 0:
-                sunburst_data_df = df_filtered[df_filtered['deaths'] > 0].groupby('incident_type')['deaths'].sum().reset_index()
-                sunburst_data_df = sunburst_data_df.sort_values(by='deaths', ascending=False)
+                with tracing.span("aggregate:sunburst") as sunburst_span:
+                    df_with_deaths = df_filtered[df_filtered['deaths'] > 0]
+                    sunburst_data_df = aggregations.aggregate(
+                        df_with_deaths, 'incident_type', sums=['deaths'], codes=dimension_codes(df_with_deaths, ['incident_type'])
+                    ).reset_index()
+                    sunburst_data_df = sunburst_data_df.sort_values(by='deaths', ascending=False)
+                    sunburst_span["rows"] = len(sunburst_data_df)
 
                 # Additional validation to prevent "weights sum to zero" error
                 if not sunburst_data_df.empty and sunburst_data_df['deaths'].sum() > 0:
@@ -1239,7 +1371,7 @@ document.addEventListener('DOMContentLoaded', function() {
                         leaf_opacity=0.9,
                         marker_line_width=0.5, marker_line_color='rgba(0,0,0,0.4)'
                     )
-                    st.plotly_chart(style_plotly_chart(fig_sunburst, chart_height=300, is_pie_or_donut=True), use_container_width=True, key=f"sunburst_chart_{total_deaths}_{start_date}_{end_date}")
+                    tracing.emit_chart("sunburst", style_plotly_chart(fig_sunburst, chart_height=300, is_pie_or_donut=True), use_container_width=True, key="sunburst_chart")
                 else: st.caption("No death data by incident type to display for the selected filters.")
             elif not ('deaths' in df_filtered.columns and 'incident_type' in df_filtered.columns):
                 st.caption("Required columns ('deaths', 'incident_type') missing for sunburst chart.")
@@ -1260,9 +1392,10 @@ document.addEventListener('DOMContentLoaded', function() {
                 ].copy()
 
                 if not df_7_months.empty:
-                    df_7_months['year_month'] = df_7_months['date'].dt.to_period('M')
-                    monthly_summary_7_months = df_7_months.groupby('year_month')['deaths'].sum().reset_index()
-                    monthly_summary_7_months['month_label'] = monthly_summary_7_months['year_month'].dt.strftime('%b %Y')
+                    with tracing.span("aggregate:deaths_7_months"):
+                        df_7_months['year_month'] = fiscal_calendar.month_ordinal(df_7_months['year'].astype('int32'), df_7_months['month'])
+                        monthly_summary_7_months = df_7_months.groupby('year_month')['deaths'].sum().reset_index()
+                    monthly_summary_7_months['month_label'] = fiscal_calendar.month_ordinals_to_dates(monthly_summary_7_months['year_month']).strftime('%b %Y')
                     monthly_summary_7_months = monthly_summary_7_months.sort_values('year_month')
 
                     if not monthly_summary_7_months.empty and monthly_summary_7_months['deaths'].sum() > 0:
@@ -1306,7 +1439,7 @@ document.addEventListener('DOMContentLoaded', function() {
                         )
 
                         fig_7_months = style_plotly_chart(fig_7_months, chart_height=330)  # Adjusted height for optimal space utilization
-                        st.plotly_chart(fig_7_months, use_container_width=True, config={'displayModeBar': False}, key=f"deaths_7_months_chart_{gauge_key_base}")
+                        tracing.emit_chart("deaths_7_months", fig_7_months, use_container_width=True, config={'displayModeBar': False}, key="deaths_7_months_chart")
                     else:
                         st.caption("No deaths recorded in the last 7 months for the selected filters.")
                 else:
@@ -1325,8 +1458,13 @@ document.addEventListener('DOMContentLoaded', function() {
 
     with treemap_col:
         if not df_filtered.empty and 'district' in df_filtered.columns and 'incident_type' in df_filtered.columns:
-            df_treemap = df_filtered.groupby(['district', 'incident_type']).size().reset_index(name='incident_count')
-            df_treemap = df_treemap[df_treemap['incident_count'] > 0]
+            with tracing.span("aggregate:treemap") as treemap_span:
+                df_treemap = aggregations.aggregate(
+                    df_filtered, ['district', 'incident_type'], count='incident_count',
+                    codes=dimension_codes(df_filtered, ['district', 'incident_type'])
+                ).reset_index()
+                df_treemap = df_treemap[df_treemap['incident_count'] > 0]
+                treemap_span["rows"] = len(df_treemap)
 
             # Additional validation to prevent "weights sum to zero" error
             if not df_treemap.empty and df_treemap['incident_count'].sum() > 0:
@@ -1399,7 +1537,7 @@ document.addEventListener('DOMContentLoaded', function() {
                         paper_bgcolor='white'  
                     )
 
-                    st.plotly_chart(style_plotly_chart(fig_treemap, chart_height=380, is_pie_or_donut=True), use_container_width=True, key=f"treemap_chart_{total_incidents}_{start_date}_{end_date}")
+                    tracing.emit_chart("treemap", style_plotly_chart(fig_treemap, chart_height=380, is_pie_or_donut=True), use_container_width=True, key="treemap_chart")
 
                 except Exception as e:
                     st.error(f"Could not render Treemap: {e}")
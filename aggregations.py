@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+# Group-by kernels for the dashboards' low-cardinality dimensions (districts, blocks, incident
+# types, days). Each key column is factorized to dense integer codes, the codes are combined into
+# one composite code per row, and the sums, counts and maxima are taken with np.bincount and
+# np.fmax.at over that code. This avoids pandas' general hash-based groupby for group counts that
+# are tiny next to the row count.
+
+# Composite code spaces larger than this (and sparsely used) are renumbered to the observed groups
+MAX_DENSE_GROUPS = 1 << 16
+
+
+def _group_codes(df, by, codes):
+    """Composite group code per row for rows with no missing key, plus the key levels."""
+    codes_list, levels = [], []
+    for col in by:
+        if col in codes:
+            col_codes, uniques = codes[col]
+            uniques = pd.Index(uniques)
+        else:
+            col_codes, uniques = pd.factorize(df[col], sort=True)
+        codes_list.append(np.asarray(col_codes))
+        levels.append(uniques)
+    valid = np.ones(len(df), dtype=bool)
+    for key_codes in codes_list:
+        valid &= key_codes >= 0
+    sizes = tuple(max(len(u), 1) for u in levels)
+    flat = np.ravel_multi_index([key_codes[valid] for key_codes in codes_list], sizes)
+    return flat, valid, sizes, levels
+
+
+def _group_index(group_ids, sizes, levels, by):
+    positions = np.unravel_index(group_ids, sizes)
+    arrays = [levels[i].take(positions[i]) for i in range(len(by))]
+    if len(by) == 1:
+        return pd.Index(arrays[0], name=by[0])
+    return pd.MultiIndex.from_arrays(arrays, names=by)
+
+
+def _restore_dtype(result, dtype):
+    if np.issubdtype(dtype, np.integer) or np.issubdtype(dtype, np.bool_):
+        if not np.isnan(result).any():
+            return result.astype(np.int64)
+    return result
+
+
+def aggregate(df, by, sums=(), maxes=(), count=None, codes=None):
+    """Grouped sums, maxima and row count of `df` by the columns `by`.
+
+    Equivalent to df.groupby(by).agg(...) with sort=True and observed groups only: rows with a
+    missing key are dropped, missing values are skipped, and integer columns are summed as int64.
+    Returns a frame indexed by the group keys with the `sums` columns, then `maxes`, then `count`.
+
+    `codes` may map a key column to precomputed `(row codes, sorted labels)` aligned with `df`
+    (-1 for missing), e.g. from a dataset's CategoryIndex, which skips hashing that column.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    sums, maxes = list(sums), list(maxes)
+    flat, valid, sizes, levels = _group_codes(df, by, codes or {})
+
+    n_groups = int(np.prod(sizes))
+    if n_groups > max(MAX_DENSE_GROUPS, 4 * len(flat)):
+        group_ids, flat = np.unique(flat, return_inverse=True)
+        n_groups = len(group_ids)
+    else:
+        group_ids = None
+
+    counts = np.bincount(flat, minlength=n_groups)
+    present = counts > 0
+    observed = np.flatnonzero(present) if group_ids is None else group_ids[present]
+
+    out = {}
+    for col in sums:
+        values = df[col].to_numpy()[valid]
+        weights = np.where(pd.isna(values), 0, values).astype(np.float64)
+        out[col] = _restore_dtype(np.bincount(flat, weights=weights, minlength=n_groups)[present], df[col].dtype)
+    for col in maxes:
+        values = df[col].to_numpy()[valid].astype(np.float64)
+        acc = np.full(n_groups, np.nan)
+        np.fmax.at(acc, flat, values)
+        out[col] = _restore_dtype(acc[present], df[col].dtype)
+    if count:
+        out[count] = counts[present].astype(np.int64)
+
+    return pd.DataFrame(out, index=_group_index(observed, sizes, levels, by), columns=sums + maxes + ([count] if count else []))
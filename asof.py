@@ -0,0 +1,70 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+import sparse_columns
+from fiscal_calendar import MISSING_DAY
+
+# As-of ("latest value") lookups over cumulative data. Tables such as FloodDetailsCum report
+# running totals per district, so a period's figure for a district is its last report on or before
+# the end of the period, and a state-wide figure is the sum of those. Summing every report in
+# the period counts each day's running total again.
+#
+# The table keeps the row positions grouped by key and in day order within each group, with one
+# composite (key, day) number per row, so the latest row of every key is one vectorised
+# searchsorted: O(keys * log rows) per period instead of a group-by over every row in it. Values
+# are read from the frame the table was built on, only for those rows.
+
+_DAY_BIAS = 1 << 31  # shifts int32 day ordinals to non-negative before packing them with the key
+
+
+def _pack(key_codes, days):
+    return (np.asarray(key_codes, dtype=np.int64) << 32) | (np.asarray(days, dtype=np.int64) + _DAY_BIAS)
+
+
+@dataclass(frozen=True)
+class AsOfTable:
+    keys: pd.Index         # distinct keys, sorted
+    composite: np.ndarray  # packed (key code, day) per row, ascending
+    days: np.ndarray       # day ordinal per row, same order
+    row_ids: np.ndarray    # position of each row in the frame the table was built on, same order
+
+    def latest_rows(self, start_day, end_day):
+        """(keys, frame row positions) of each key's last row dated in [start_day, end_day]; keys
+        with no row in the period are left out."""
+        codes = np.arange(len(self.keys))
+        pos = np.searchsorted(self.composite, _pack(codes, np.full(len(codes), end_day)), side="right") - 1
+        found = pos >= 0
+        found[found] = (self.composite[pos[found]] >> 32) == codes[found]
+        found[found] = self.days[pos[found]] >= start_day
+        return self.keys[found], self.row_ids[pos[found]]
+
+    def latest(self, df, columns, start_day, end_day):
+        """Frame of each key's latest `columns` in [start_day, end_day], indexed by key. `df` is
+        the frame the table was built on; its columns may be sparse (see sparse_columns)."""
+        keys, rows = self.latest_rows(start_day, end_day)
+        return pd.DataFrame({col: sparse_columns.take(df[col], rows) for col in columns}, index=keys, columns=list(columns))
+
+    def totals(self, df, columns, start_day, end_day):
+        """Sum over keys of their latest `columns` in [start_day, end_day]."""
+        return self.latest(df, columns, start_day, end_day).sum()
+
+
+def build_asof_table(df, key, day_col="day_ordinal"):
+    """AsOfTable by `key` over a frame with integer day ordinals in `day_col`.
+
+    Rows with a missing key or date are skipped. Several rows for the same key and day keep their
+    order in `df`, so the last of them counts as the latest.
+    """
+    days = df[day_col].to_numpy()
+    codes, keys = pd.factorize(df[key], sort=True)
+    valid = np.flatnonzero((codes >= 0) & (days != MISSING_DAY))
+    composite = _pack(codes[valid], days[valid])
+    order = np.argsort(composite, kind="stable")
+    composite = composite[order]
+    row_ids = valid[order]
+    days = days[row_ids]
+    for arr in (composite, days, row_ids):
+        arr.flags.writeable = False
+    return AsOfTable(keys=pd.Index(keys, name=key), composite=composite, days=days, row_ids=row_ids)
@@ -0,0 +1,241 @@
+import dataclasses
+import functools
+import inspect
+import os
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Bounded replacement for @st.cache_data. st.cache_data keeps every distinct argument combination
+# forever unless each call site remembers max_entries/ttl, and nothing caps the caches as a whole.
+# Here every cache registers under a name, is sized per entry, and shares one process-wide byte
+# budget (EOC_CACHE_BUDGET_MB); when the budget is exceeded the least recently used entry across
+# all caches is dropped. Caches are looked up by name, so a function redefined inside a
+# dashboard's run() on every rerun keeps using the same cache.
+
+DEFAULT_BUDGET_MB = 256
+
+
+def _budget_bytes():
+    try:
+        return int(float(os.environ.get("EOC_CACHE_BUDGET_MB", DEFAULT_BUDGET_MB)) * 1024 * 1024)
+    except ValueError:
+        print(f"Invalid EOC_CACHE_BUDGET_MB, using {DEFAULT_BUDGET_MB} MB")
+        return DEFAULT_BUDGET_MB * 1024 * 1024
+
+
+BUDGET_BYTES = _budget_bytes()
+
+_lock = threading.RLock()
+_caches = {}
+
+
+def _frozen_frame_size(value):
+    """Deep size of a frame or series with read-only object arrays (see datastore.freeze_frame),
+    which pandas' deep memory_usage cannot read. Adds each object's own size to the shallow size,
+    as the deep sizing does."""
+    usage = value.memory_usage(deep=False)
+    total = int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    columns = [col for _, col in value.items()] if isinstance(value, pd.DataFrame) else [value]
+    for values in [col.to_numpy() for col in columns if col.dtype == object] + [value.index.to_numpy()]:
+        if values.dtype == object:
+            total += sum(map(sys.getsizeof, values))
+    return total
+
+
+def sizeof(value):
+    """Approximate memory held by a cached value, in bytes."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        try:
+            usage = value.memory_usage(deep=True)
+        except ValueError:
+            return _frozen_frame_size(value)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return sum(sizeof(getattr(value, f.name)) for f in dataclasses.fields(value))
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 0
+
+
+class _Entry:
+    __slots__ = ("value", "size", "expires", "last_used")
+
+    def __init__(self, value, size, expires):
+        self.value = value
+        self.size = size
+        self.expires = expires
+        self.last_used = time.monotonic()
+
+
+class GovernedCache:
+    def __init__(self, name, max_entries=None, ttl=None):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()  # least recently used first
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.computes = 0
+        self.compute_seconds = 0.0
+
+    def get(self, key):
+        with _lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry.expires is not None and entry.expires <= time.monotonic():
+                self._drop(key, evicted=True)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+            entry.last_used = time.monotonic()
+            self.entries.move_to_end(key)
+            return True, entry.value
+
+    def put(self, key, value):
+        size = sizeof(value)
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with _lock:
+            if key in self.entries:
+                self._drop(key, evicted=False)
+            if size > BUDGET_BYTES:
+                return
+            self.entries[key] = _Entry(value, size, expires)
+            self.bytes += size
+            while self.max_entries and len(self.entries) > self.max_entries:
+                self._drop(next(iter(self.entries)), evicted=True)
+            _enforce_budget()
+
+    def record_compute(self, seconds):
+        with _lock:
+            self.computes += 1
+            self.compute_seconds += seconds
+
+    def clear(self):
+        with _lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def _drop(self, key, evicted):
+        entry = self.entries.pop(key)
+        self.bytes -= entry.size
+        if evicted:
+            self.evictions += 1
+
+    def _purge_expired(self):
+        now = time.monotonic()
+        for key in [k for k, e in self.entries.items() if e.expires is not None and e.expires <= now]:
+            self._drop(key, evicted=True)
+
+    def stats(self):
+        with _lock:
+            return {
+                "cache": self.name,
+                "entries": len(self.entries),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "computes": self.computes,
+                "compute_seconds": round(self.compute_seconds, 4),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+            }
+
+
+def total_bytes():
+    with _lock:
+        return sum(c.bytes for c in _caches.values())
+
+
+def _enforce_budget():
+    """Drops expired entries, then the least recently used entries across all caches, until the
+    total is back under the budget. Caller holds _lock."""
+    for cache in _caches.values():
+        cache._purge_expired()
+    total = sum(c.bytes for c in _caches.values())
+    while total > BUDGET_BYTES:
+        oldest = min(
+            (c for c in _caches.values() if c.entries),
+            key=lambda c: next(iter(c.entries.values())).last_used,
+            default=None,
+        )
+        if oldest is None:
+            break
+        key = next(iter(oldest.entries))
+        total -= oldest.entries[key].size
+        oldest._drop(key, evicted=True)
+
+
+def get_cache(name, max_entries=None, ttl=None):
+    """Returns the cache registered as `name`, creating it on first use. Later calls update its limits."""
+    with _lock:
+        cache = _caches.get(name)
+        if cache is None:
+            cache = _caches[name] = GovernedCache(name, max_entries, ttl)
+        else:
+            cache.max_entries, cache.ttl = max_entries, ttl
+        return cache
+
+
+def _make_key(signature, args, kwargs):
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    # Same convention as st.cache_data: parameters starting with "_" are not part of the key
+    items = tuple((k, v) for k, v in bound.arguments.items() if not k.startswith("_"))
+    try:
+        hash(items)
+        return items
+    except TypeError:
+        return pickle.dumps(items, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def governed_cache(name, max_entries=None, ttl=None):
+    """Decorator caching a function's results in the governed cache `name`.
+
+    Data frames come back as shallow copies (copy-on-write keeps them from sharing later edits
+    with the cached frame); any other value is returned as the cached object itself, so callers
+    must not modify it. Two sessions missing on the same key at once may both compute it.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        cache = get_cache(name, max_entries, ttl)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = _make_key(signature, args, kwargs)
+            found, value = cache.get(key)
+            if not found:
+                start = time.perf_counter()
+                value = func(*args, **kwargs)
+                cache.record_compute(time.perf_counter() - start)
+                cache.put(key, value)
+            if isinstance(value, pd.DataFrame):
+                return value.copy(deep=False)
+            return value
+
+        wrapper.cache = cache
+        wrapper.clear = cache.clear
+        return wrapper
+
+    return decorator
+
+
+def stats():
+    """Counters for every registered cache, for diagnostics."""
+    with _lock:
+        caches = list(_caches.values())
+    return [c.stats() for c in caches]
@@ -0,0 +1,166 @@
+import threading
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+# Process-wide store for the dashboards' main datasets. st.cache_data hands every caller its own
+# unpickled copy of a cached frame, so each session held a full copy of every dataset; here each
+# dataset is loaded once, frozen (read-only column arrays) and shared by all sessions. A reload
+# after the TTL swaps in a new object with a higher version and leaves the old one untouched for
+# any rerun still reading it.
+
+_derive_lock = threading.Lock()
+
+# After a reload comes back empty (database unreachable), the previous version keeps being served
+# and the load is not retried for this many seconds
+RETRY_INTERVAL = 60
+
+
+@dataclass(frozen=True)
+class SharedDataset:
+    name: str
+    version: int
+    frame: pd.DataFrame  # read-only; use view() to get a frame you may add columns to
+    loaded_at: float
+    derived: dict = field(default_factory=dict, repr=False, compare=False)
+
+    def view(self):
+        """Shallow copy for one session. Under copy-on-write it shares all column memory until modified."""
+        return self.frame.copy(deep=False)
+
+    def derive(self, key, builder):
+        """Returns `builder(frame)`, built once for this version and shared like the frame itself.
+
+        A reload produces a new SharedDataset, so derived artifacts never outlive the data they
+        were built from.
+        """
+        if key in self.derived:
+            return self.derived[key]
+        with _derive_lock:
+            if key not in self.derived:
+                self.derived[key] = builder(self.frame)
+            return self.derived[key]
+
+
+def freeze_frame(df):
+    """Rebuilds `df` on read-only views of its column arrays, so in-place writes raise instead of
+    silently changing the data other sessions see."""
+    columns = {}
+    for col in df.columns:
+        values = df[col].array
+        if isinstance(df[col].dtype, np.dtype):
+            values = df[col].to_numpy().view()
+            values.flags.writeable = False
+        columns[col] = values
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+# Module-level rather than st.cache_resource: clearing the resource cache must not swap in fresh
+# per-dataset locks while a load still holds the old ones
+_registry = {"datasets": {}, "versions": {}, "locks": {}, "stats": {}, "retry_at": {}, "lock": threading.Lock()}
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    """A named dataset, the function that loads it and how long a load stays fresh."""
+    name: str
+    loader: object
+    ttl: float
+
+    def get(self):
+        return get_dataset(self.name, self.loader, self.ttl)
+
+    def refresh(self):
+        return refresh(self.name, self.loader)
+
+
+def _count(name, field, amount=1):
+    with _registry["lock"]:
+        counters = _registry["stats"].setdefault(name, {"hits": 0, "loads": 0, "load_seconds": 0.0})
+        counters[field] += amount
+
+
+def _dataset_lock(name):
+    with _registry["lock"]:
+        return _registry["locks"].setdefault(name, threading.Lock())
+
+
+def get_dataset(name, loader, ttl):
+    """Returns the shared dataset `name`, calling `loader()` when it is missing or older than `ttl` seconds.
+
+    Concurrent sessions asking for the same stale dataset wait for a single load. The loaders
+    return an empty frame on failure: if an earlier version exists it is served instead and the
+    load is retried after RETRY_INTERVAL; if nothing has loaded yet the empty frame is handed back,
+    not kept, so the next rerun retries.
+    """
+    dataset = _registry["datasets"].get(name)
+    if dataset is not None and _is_fresh(name, dataset, ttl):
+        _count(name, "hits")
+        return dataset
+
+    with _dataset_lock(name):
+        dataset = _registry["datasets"].get(name)
+        if dataset is not None and _is_fresh(name, dataset, ttl):
+            _count(name, "hits")
+            return dataset
+        return _load(name, loader)
+
+
+def _is_fresh(name, dataset, ttl):
+    now = time.time()
+    return now - dataset.loaded_at < ttl or now < _registry["retry_at"].get(name, 0)
+
+
+def refresh(name, loader):
+    """Reloads `name` now, stale or not. Sessions keep reading the current version until the new
+    one replaces it; if the load comes back empty the current version stays in place."""
+    with _dataset_lock(name):
+        return _load(name, loader)
+
+
+def age(name):
+    """Seconds since `name` was loaded, or None if it has never loaded successfully."""
+    dataset = _registry["datasets"].get(name)
+    return None if dataset is None else time.time() - dataset.loaded_at
+
+
+def _load(name, loader):
+    """Calls `loader()` and publishes the result as the next version. Caller holds the dataset lock."""
+    start = time.perf_counter()
+    df = loader()
+    _count(name, "loads")
+    _count(name, "load_seconds", time.perf_counter() - start)
+    current = _registry["datasets"].get(name)
+    if df.empty and current is not None:
+        _registry["retry_at"][name] = time.time() + RETRY_INTERVAL
+        print(f"Reload of {name} came back empty; serving version {current.version}, retrying in {RETRY_INTERVAL}s")
+        return current
+    version = _registry["versions"].get(name, 0) + 1
+    dataset = SharedDataset(name, version, freeze_frame(df), time.time())
+    if not df.empty:
+        _registry["versions"][name] = version
+        _registry["datasets"][name] = dataset
+        _registry["retry_at"].pop(name, None)
+    return dataset
+
+
+def stats():
+    """Load counters and the current size of every shared dataset, for diagnostics."""
+    with _registry["lock"]:
+        counters = {name: dict(c) for name, c in _registry["stats"].items()}
+    rows = []
+    for name, c in counters.items():
+        dataset = _registry["datasets"].get(name)
+        rows.append({
+            "dataset": name,
+            "version": dataset.version if dataset else 0,
+            "rows": len(dataset.frame) if dataset else 0,
+            "bytes": int(dataset.frame.memory_usage(deep=False).sum()) if dataset else 0,
+            "age_seconds": round(time.time() - dataset.loaded_at, 1) if dataset else None,
+            "hits": c["hits"],
+            "loads": c["loads"],
+            "load_seconds": round(c["load_seconds"], 4),
+        })
+    return rows
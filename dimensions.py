@@ -0,0 +1,35 @@
+from dataclasses import dataclass
+
+# Small lookup tables of the distinct values in a dataset's categorical columns, used for filter
+# option lists. They are built once per dataset version through SharedDataset.derive(), so a
+# rerun reads a prepared list instead of scanning a whole column with unique().
+
+
+@dataclass(frozen=True)
+class DimensionTables:
+    members: dict   # column -> sorted tuple of distinct values
+    children: dict  # (parent column, child column) -> {parent value: sorted tuple of child values}
+
+    def values(self, column):
+        return self.members.get(column, ())
+
+    def children_of(self, parent_column, child_column, parent_value):
+        return self.children.get((parent_column, child_column), {}).get(parent_value, ())
+
+
+def build_dimensions(df, columns, hierarchies=()):
+    """Distinct values of each of `columns`, and for each (parent, child) pair in `hierarchies`
+    the child values occurring under every parent value. Missing values are left out."""
+    members = {
+        col: tuple(sorted(df[col].dropna().unique()))
+        for col in columns if col in df.columns
+    }
+    children = {}
+    for parent, child in hierarchies:
+        if parent not in df.columns or child not in df.columns:
+            continue
+        pairs = df[[parent, child]].dropna().drop_duplicates().sort_values([parent, child])
+        children[(parent, child)] = {
+            key: tuple(group[child]) for key, group in pairs.groupby(parent, sort=False)
+        }
+    return DimensionTables(members, children)
@@ -0,0 +1,82 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Integer calendar columns added to every dataset at load. Filters and daily/monthly charts work
+# on these instead of calling .dt.date / .dt.year / .dt.to_period on every rerun, which allocate
+# new arrays (or a Python date object per row) each time.
+#
+#   day_ordinal  int32  days since 1970-01-01 (MISSING_DAY for missing dates)
+#   year, month  int16 / int8 calendar year and month (0 for missing dates)
+#   fy           int16  financial year (April-March) by its starting year, e.g. 2024 for FY 2024-25
+
+FY_START_MONTH = 4
+MISSING_DAY = np.iinfo(np.int32).min
+
+
+def day_ordinal(value):
+    """Day ordinal of a single date, datetime or Timestamp."""
+    return int(pd.Timestamp(value).to_datetime64().astype("datetime64[D]").astype(np.int64))
+
+
+def ordinals_to_dates(ordinals):
+    """DatetimeIndex (midnight) for an array of day ordinals."""
+    return pd.DatetimeIndex(np.asarray(ordinals, dtype=np.int64).astype("datetime64[D]").astype("datetime64[ns]"))
+
+
+def month_ordinal(year, month):
+    """Months since January 1970; works element-wise on arrays."""
+    return (year - 1970) * 12 + (month - 1)
+
+
+def month_ordinals_to_dates(ordinals):
+    """DatetimeIndex of the first day of each month ordinal."""
+    return pd.DatetimeIndex(np.asarray(ordinals, dtype=np.int64).astype("datetime64[M]").astype("datetime64[ns]"))
+
+
+def fy_of(year, month):
+    """Starting year of the financial year containing (year, month); works element-wise on arrays."""
+    return np.where(np.asarray(month) >= FY_START_MONTH, year, np.asarray(year) - 1)
+
+
+def add_calendar_columns(df, date_col):
+    """Adds day_ordinal, year, month and fy columns derived from `date_col` to `df` in place."""
+    dates = pd.to_datetime(df[date_col]).to_numpy()
+    missing = np.isnat(dates)
+    days = dates.astype("datetime64[D]").astype(np.int64)
+    months = dates.astype("datetime64[M]").astype(np.int64)
+    year = months // 12 + 1970
+    month = months % 12 + 1
+
+    df['day_ordinal'] = np.where(missing, MISSING_DAY, days).astype(np.int32)
+    df['year'] = np.where(missing, 0, year).astype(np.int16)
+    df['month'] = np.where(missing, 0, month).astype(np.int8)
+    df['fy'] = np.where(missing, 0, fy_of(year, month)).astype(np.int16)
+    return df
+
+
+def fy_label(fy):
+    """'FY 2024-25' for fy 2024."""
+    return f"FY {fy}-{(fy + 1) % 100:02d}"
+
+
+def parse_fy_label(label):
+    """Inverse of fy_label; None for anything else (e.g. 'All Time')."""
+    try:
+        return int(label.split(" ")[1].split("-")[0])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def fy_bounds(fy):
+    """First and last day of a financial year."""
+    return date(fy, FY_START_MONTH, 1), date(fy + 1, FY_START_MONTH, 1) - timedelta(days=1)
+
+
+def fy_range(df):
+    """Financial years present in a frame with a fy column, latest first. Years with no rows
+    are left out, so every year offered has data."""
+    fys = df.loc[df['fy'] > 0, 'fy'].to_numpy()
+    return [int(fy) for fy in np.unique(fys)[::-1]]
+
@@ -0,0 +1,176 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+from dataclasses import dataclass
+
+import numpy as np
+
+# Binary cache of boundary files (districts.json, and later block or panchayat boundaries).
+# GeoJSON is text that must be parsed in full before any coordinate can be used; the build step
+# below flattens it once into .npy arrays, which are then memory-mapped, so opening a boundary
+# set costs almost nothing and the coordinates are read straight from the page cache.
+#
+# Layout of <cache dir>/<source name>/:
+#   coords.npy           float32 (points, 2)    lon, lat of every ring vertex, ring after ring
+#   ring_offsets.npy     int64 (rings + 1)      ring i is coords[ring_offsets[i]:ring_offsets[i + 1]]
+#   polygon_offsets.npy  int64 (polygons + 1)   polygon j is rings polygon_offsets[j]:[j + 1], exterior first
+#   feature_offsets.npy  int64 (features + 1)   feature k is polygons feature_offsets[k]:[k + 1]
+#   bboxes.npy           float32 (features, 4)  min lon, min lat, max lon, max lat
+#   names.npy            str (features)         the feature's name property
+#   source.json          size and mtime of the source file the cache was built from
+#
+# The cache is rebuilt whenever the source file changes. Build it ahead of deployment with
+#   python geometry.py districts.json
+
+CACHE_DIR = os.environ.get("EOC_GEOMETRY_CACHE", ".geometry_cache")
+ARRAYS = ("coords", "ring_offsets", "polygon_offsets", "feature_offsets", "bboxes", "names")
+
+
+@dataclass(frozen=True)
+class Boundaries:
+    names: np.ndarray
+    coords: np.ndarray
+    ring_offsets: np.ndarray
+    polygon_offsets: np.ndarray
+    feature_offsets: np.ndarray
+    bboxes: np.ndarray
+
+    def __len__(self):
+        return len(self.names)
+
+    def ring(self, i):
+        return self.coords[self.ring_offsets[i]:self.ring_offsets[i + 1]]
+
+    def polygons(self, feature):
+        """Polygons of a feature, each a list of (n, 2) coordinate arrays, exterior ring first."""
+        return [
+            [self.ring(r) for r in range(self.polygon_offsets[p], self.polygon_offsets[p + 1])]
+            for p in range(self.feature_offsets[feature], self.feature_offsets[feature + 1])
+        ]
+
+    def to_geojson(self, name_property="district", decimals=5):
+        """GeoJSON FeatureCollection of the boundaries, e.g. for a plotly choropleth."""
+        features = []
+        for k, name in enumerate(self.names):
+            polygons = [[np.round(ring.astype(np.float64), decimals).tolist() for ring in poly] for poly in self.polygons(k)]
+            geometry = {"type": "Polygon", "coordinates": polygons[0]} if len(polygons) == 1 else {"type": "MultiPolygon", "coordinates": polygons}
+            features.append({"type": "Feature", "properties": {name_property: str(name)}, "geometry": geometry})
+        return {"type": "FeatureCollection", "features": features}
+
+
+def _source_stamp(source):
+    stat = os.stat(source)
+    return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def cache_path(source, cache_dir=None):
+    name = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(cache_dir or CACHE_DIR, name)
+
+
+def _flatten(geojson, name_property):
+    names, coords, ring_offsets, polygon_offsets, feature_offsets = [], [], [0], [0], [0]
+    for feature in geojson["features"]:
+        geom = feature.get("geometry") or {}
+        polygons = geom.get("coordinates") or []
+        if geom.get("type") == "Polygon":
+            polygons = [polygons]
+        for poly in polygons:
+            for ring in poly:
+                coords.extend(point[:2] for point in ring)
+                ring_offsets.append(len(coords))
+            polygon_offsets.append(len(ring_offsets) - 1)
+        feature_offsets.append(len(polygon_offsets) - 1)
+        names.append(str(feature.get("properties", {}).get(name_property, "")))
+
+    coords = np.asarray(coords, dtype=np.float32).reshape(-1, 2)
+    ring_offsets = np.asarray(ring_offsets, dtype=np.int64)
+    bboxes = np.full((len(names), 4), np.nan, dtype=np.float32)
+    for k in range(len(names)):
+        first_ring = polygon_offsets[feature_offsets[k]]
+        last_ring = polygon_offsets[feature_offsets[k + 1]]
+        points = coords[ring_offsets[first_ring]:ring_offsets[last_ring]]
+        if len(points):
+            bboxes[k] = (*points.min(axis=0), *points.max(axis=0))
+    return {
+        "coords": coords,
+        "ring_offsets": ring_offsets,
+        "polygon_offsets": np.asarray(polygon_offsets, dtype=np.int64),
+        "feature_offsets": np.asarray(feature_offsets, dtype=np.int64),
+        "bboxes": bboxes,
+        "names": np.asarray(names, dtype=str),
+    }
+
+
+def _read_source(source, name_property):
+    with open(source, "r", encoding="utf-8") as f:
+        return _flatten(json.load(f), name_property)
+
+
+def _write(arrays, source, target):
+    """Writes the cache for `source` to `target`. It is written to a temporary directory and
+    swapped in, so readers never see half a cache; when several processes or sessions build at
+    once, the first swap wins and the others discard their copy."""
+    parent = os.path.dirname(target) or "."
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=f"{os.path.basename(target)}.tmp", dir=parent)
+    try:
+        for name, arr in arrays.items():
+            np.save(os.path.join(tmp, f"{name}.npy"), arr, allow_pickle=False)
+        with open(os.path.join(tmp, "source.json"), "w") as f:
+            json.dump(_source_stamp(source), f)
+        for _ in range(3):
+            try:
+                os.replace(tmp, target)
+                return
+            except OSError:
+                # The target exists: either another build has just finished, or it is stale
+                if _is_current(source, target):
+                    return
+                stale = f"{tmp}.stale"
+                try:
+                    os.replace(target, stale)
+                except OSError:
+                    continue  # another build moved it first
+                shutil.rmtree(stale, ignore_errors=True)
+        os.replace(tmp, target)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def build(source, cache_dir=None, name_property="district"):
+    """Converts the GeoJSON file `source` into the binary cache and returns the cache directory."""
+    target = cache_path(source, cache_dir)
+    _write(_read_source(source, name_property), source, target)
+    return target
+
+
+def _is_current(source, target):
+    try:
+        with open(os.path.join(target, "source.json")) as f:
+            return json.load(f) == _source_stamp(source)
+    except (OSError, ValueError):
+        return False
+
+
+def load(source, cache_dir=None, name_property="district"):
+    """Boundaries of the GeoJSON file `source`, memory-mapped from its binary cache, which is
+    built first if it is missing or older than the source. If the cache cannot be written (e.g.
+    a read-only deployment), the boundaries are served from memory instead."""
+    target = cache_path(source, cache_dir)
+    if not _is_current(source, target):
+        arrays = _read_source(source, name_property)
+        try:
+            _write(arrays, source, target)
+        except OSError as e:
+            print(f"Geometry cache for {source} not written ({e}); using it from memory")
+            return Boundaries(**arrays)
+    arrays = {name: np.load(os.path.join(target, f"{name}.npy"), mmap_mode="r", allow_pickle=False) for name in ARRAYS}
+    return Boundaries(**arrays)
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:] or ["districts.json"]:
+        print(f"{path} -> {build(path)}")
@@ -0,0 +1,74 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Inverted indexes over a shared dataset's categorical columns. Each distinct value maps to the
+# sorted row positions holding it (a posting list), so an equality filter is a slice instead of
+# a string comparison over the whole column, and several filters combine by intersecting lists.
+# Indexes are built once per dataset version through SharedDataset.derive().
+
+
+def _read_only(arr):
+    arr.flags.writeable = False
+    return arr
+
+
+@dataclass(frozen=True)
+class CategoryIndex:
+    labels: np.ndarray   # sorted distinct values
+    codes: np.ndarray    # per row, position of its value in labels (-1 for missing)
+    row_ids: np.ndarray  # row positions grouped by code, ascending within each group
+    offsets: np.ndarray  # rows holding labels[i] are row_ids[offsets[i]:offsets[i + 1]]
+    lookup: dict         # label -> position in labels
+
+    def rows(self, label):
+        """Sorted row positions holding `label`; empty if the value never occurs."""
+        i = self.lookup.get(label)
+        if i is None:
+            return self.row_ids[:0]
+        return self.row_ids[self.offsets[i]:self.offsets[i + 1]]
+
+    def encode(self, rows):
+        """(codes, labels) for the given row positions, as taken by aggregations.aggregate."""
+        return self.codes[rows], self.labels
+
+
+def build_category_index(values):
+    codes, labels = pd.factorize(values, sort=True)
+    codes = codes.astype(np.int32)
+    order = np.argsort(codes, kind="stable")
+    # Missing values have code -1 and sort first
+    row_ids = order[np.count_nonzero(codes < 0):]
+    counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    labels = np.asarray(labels, dtype=object)
+    return CategoryIndex(
+        labels=_read_only(labels),
+        codes=_read_only(codes),
+        row_ids=_read_only(row_ids.astype(np.int64)),
+        offsets=_read_only(offsets.astype(np.int64)),
+        lookup={label: i for i, label in enumerate(labels)},
+    )
+
+
+def build_indexes(df, columns):
+    """CategoryIndex for each of `columns` present in `df`."""
+    return {col: build_category_index(df[col]) for col in columns if col in df.columns}
+
+
+def date_bounds(dates, start_date, end_date):
+    """Half-open row range [lo, hi) of a date-sorted datetime64 array falling in [start_date, end_date]."""
+    lo = np.searchsorted(dates, pd.Timestamp(start_date).to_datetime64(), side="left")
+    hi = np.searchsorted(dates, pd.Timestamp(end_date).to_datetime64(), side="right")
+    return int(lo), int(hi)
+
+
+def clip_rows(rows, lo, hi):
+    """The part of a sorted row list inside [lo, hi)."""
+    return rows[np.searchsorted(rows, lo):np.searchsorted(rows, hi)]
+
+
+def intersect(rows, other):
+    """Rows present in both sorted, duplicate-free row lists."""
+    return np.intersect1d(rows, other, assume_unique=True)
@@ -1,12 +1,23 @@
 import streamlit as st
+import pandas as pd
 import importlib
 import base64
 
+import caches
+import metrics
+import theme
+import tracing
+import warmup
+
 # UI config
 st.set_page_config(page_title="Unified Dashboard App", layout="wide")
 
+# Copy-on-write: column selections and derived frames share memory with the loaded data until
+# one of them is actually modified, so the dashboards need no defensive .copy() calls
+pd.set_option("mode.copy_on_write", True)
+
 # Image to base64 conversion function
-@st.cache_data
+@caches.governed_cache("images", max_entries=16)
 def get_image_as_base64(path):
     try:
         with open(path, "rb") as image_file:
@@ -19,20 +30,7 @@ def get_image_as_base64(path):
         st.warning(f"Image file not found at path: '{path}'. Please ensure it is in the correct directory.")
         return "data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7"
 
-#Dashboard map: name -> module name
-dashboards = {
-    "Cold Wave Dashboard": "Dashboard1",
-    "Incident Dashboard": "Dashboard2",
-    "Flood Dashboard": "Dashboard3"
-}
-
-# Sidebar logos and selection
-with st.sidebar:
-    # Displaying logos at the top
-    eoc_logo_base64 = get_image_as_base64("eoc_logo.png")
-    bihar_logo_base64 = get_image_as_base64("bihar_govt.png")
-
-    st.markdown("""
+SIDEBAR_CSS = """
     <style>
     /* Making sidebar narrower */
     .css-1d391kg, .css-1lcbm7v, .css-1v3fv7u {
@@ -71,7 +69,25 @@ with st.sidebar:
         text-shadow: none !important;
     }
     </style>
-    """, unsafe_allow_html=True)
+"""
+
+#Dashboard map: name -> module name
+dashboards = {
+    "Cold Wave Dashboard": "Dashboard1",
+    "Incident Dashboard": "Dashboard2",
+    "Flood Dashboard": "Dashboard3"
+}
+
+# Load all dashboards' data in the background at server start and keep it fresh
+warmup.start(tuple(dashboards.values()))
+
+# Sidebar logos and selection
+with st.sidebar:
+    # Displaying logos at the top
+    eoc_logo_base64 = get_image_as_base64("eoc_logo.png")
+    bihar_logo_base64 = get_image_as_base64("bihar_govt.png")
+
+    theme.apply_theme("main", SIDEBAR_CSS, slot="sidebar")
 
     # Displaying the logos
     logo_html = f'''
@@ -97,8 +113,19 @@ with st.sidebar:
 
 # Importing and running selected dashboard
 try:
-    dashboard_module = dashboards[selected]
-    dashboard = importlib.import_module(dashboard_module)
-    dashboard.run()
+    if st.query_params.get("metrics") == "1":
+        # Hidden cache/dataset metrics page, opened with ?metrics=1
+        metrics.render_metrics_page()
+    else:
+        dashboard_module = dashboards[selected]
+        dashboard = importlib.import_module(dashboard_module)
+        with tracing.run_trace(dashboard_module):
+            dashboard.run()
 except Exception as e:
-    st.error(f"Failed to run {selected}. Error:\n\n{e}")
\ No newline at end of file
+    st.error(f"Failed to run {selected}. Error:\n\n{e}")
+finally:
+    metrics.export()
+
+# Hidden stage-timing panel, opened with ?diagnostics=1
+if st.query_params.get("diagnostics") == "1":
+    tracing.render_diagnostics_panel()
\ No newline at end of file
@@ -0,0 +1,110 @@
+import os
+import threading
+import time
+
+import pandas as pd
+import streamlit as st
+
+import caches
+import datastore
+
+# Cache and dataset counters in Prometheus text format. main.py rewrites the metrics file after
+# each dashboard run (at most once every EXPORT_INTERVAL seconds) so a node_exporter textfile
+# collector can scrape it, and shows the same numbers on a hidden page at ?metrics=1.
+
+METRICS_PATH = os.environ.get("EOC_METRICS_FILE", os.path.join("logs", "eoc_metrics.prom"))
+EXPORT_INTERVAL = 15
+
+_export_lock = threading.Lock()
+_last_export = 0.0
+
+# (metric, type, help, stats field)
+CACHE_METRICS = [
+    ("eoc_cache_hits_total", "counter", "Lookups answered from the cache.", "hits"),
+    ("eoc_cache_misses_total", "counter", "Lookups that had to compute the value.", "misses"),
+    ("eoc_cache_evictions_total", "counter", "Entries dropped by max_entries, TTL or the memory budget.", "evictions"),
+    ("eoc_cache_compute_seconds_total", "counter", "Time spent computing values on a miss.", "compute_seconds"),
+    ("eoc_cache_entries", "gauge", "Entries currently held.", "entries"),
+    ("eoc_cache_bytes", "gauge", "Approximate bytes held by the entries.", "bytes"),
+]
+DATASET_METRICS = [
+    ("eoc_dataset_hits_total", "counter", "Requests served by the shared dataset already in memory.", "hits"),
+    ("eoc_dataset_loads_total", "counter", "Loads from the database.", "loads"),
+    ("eoc_dataset_load_seconds_total", "counter", "Time spent loading from the database.", "load_seconds"),
+    ("eoc_dataset_rows", "gauge", "Rows in the current version.", "rows"),
+    ("eoc_dataset_bytes", "gauge", "Bytes held by the current version.", "bytes"),
+    ("eoc_dataset_version", "gauge", "Version of the dataset currently served.", "version"),
+]
+
+
+def _family(lines, metric, kind, help_text, label, rows, field):
+    lines.append(f"# HELP {metric} {help_text}")
+    lines.append(f"# TYPE {metric} {kind}")
+    for row in rows:
+        lines.append(f'{metric}{{{label}="{row[label]}"}} {row[field]}')
+
+
+def render_prometheus():
+    cache_rows = caches.stats()
+    dataset_rows = datastore.stats()
+    lines = []
+    for metric, kind, help_text, field in CACHE_METRICS:
+        _family(lines, metric, kind, help_text, "cache", cache_rows, field)
+    lines.append("# HELP eoc_cache_budget_bytes Memory budget shared by all caches.")
+    lines.append("# TYPE eoc_cache_budget_bytes gauge")
+    lines.append(f"eoc_cache_budget_bytes {caches.BUDGET_BYTES}")
+    for metric, kind, help_text, field in DATASET_METRICS:
+        _family(lines, metric, kind, help_text, "dataset", dataset_rows, field)
+    return "\n".join(lines) + "\n"
+
+
+def export(force=False):
+    """Writes the metrics file, replacing it atomically so a scrape never sees half a file."""
+    global _last_export
+    now = time.monotonic()
+    if not force and now - _last_export < EXPORT_INTERVAL:
+        return
+    if not _export_lock.acquire(blocking=False):
+        return
+    try:
+        _last_export = now
+        directory = os.path.dirname(METRICS_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{METRICS_PATH}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(render_prometheus())
+        os.replace(tmp_path, METRICS_PATH)
+    except OSError as e:
+        print(f"Could not write metrics to {METRICS_PATH}: {e}")
+    finally:
+        _export_lock.release()
+
+
+def render_metrics_page():
+    """Hidden admin view, shown by main.py instead of a dashboard when opened with ?metrics=1."""
+    st.title("Cache Metrics")
+    cache_rows = caches.stats()
+    dataset_rows = datastore.stats()
+    budget_mb = caches.BUDGET_BYTES / (1024 * 1024)
+    used_mb = caches.total_bytes() / (1024 * 1024)
+    st.caption(f"Cache memory: {used_mb:,.2f} MB of {budget_mb:,.0f} MB budget · exported to `{METRICS_PATH}`")
+
+    st.markdown("**Caches**")
+    if cache_rows:
+        df_caches = pd.DataFrame(cache_rows)
+        lookups = df_caches['hits'] + df_caches['misses']
+        df_caches['hit_rate'] = (df_caches['hits'] / lookups.where(lookups > 0)).round(3)
+        df_caches['avg_compute_ms'] = (df_caches['compute_seconds'] * 1000 / df_caches['computes'].where(df_caches['computes'] > 0)).round(2)
+        st.dataframe(df_caches, use_container_width=True, hide_index=True)
+    else:
+        st.caption("No cache lookups yet.")
+
+    st.markdown("**Shared datasets**")
+    if dataset_rows:
+        st.dataframe(pd.DataFrame(dataset_rows), use_container_width=True, hide_index=True)
+    else:
+        st.caption("No datasets loaded yet.")
+
+    with st.expander("Prometheus text", expanded=False):
+        st.code(render_prometheus(), language="text")
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+# Sparse storage for mostly-zero measure columns, such as the flood KPIs: on most district-days
+# nothing is affected, so most values are 0. Such columns are held as pandas sparse arrays with 0
+# as the fill value, which keep only the positions (int32) and values of the nonzero entries.
+# The helpers below read those entries directly, so sums and "which rows are affected" cost time
+# in proportion to the affected rows rather than all rows. They also accept ordinary columns.
+
+SPARSE_FLOAT = pd.SparseDtype(np.float64, 0.0)
+
+
+def to_sparse(df, columns):
+    """Converts `columns` of `df` in place to sparse float columns with 0 as the fill value."""
+    for col in columns:
+        values = pd.to_numeric(df[col], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+        df[col] = pd.arrays.SparseArray(values, fill_value=0.0)
+    return df
+
+
+def nonzero(series):
+    """(positions, values) of the entries of `series` that are not 0, positions ascending."""
+    arr = series.array
+    if isinstance(arr, pd.arrays.SparseArray) and arr.fill_value == 0:
+        positions, values = arr.sp_index.indices, arr.sp_values
+    else:
+        values = series.to_numpy(dtype=np.float64)
+        positions = np.arange(len(values))
+    keep = values != 0
+    return positions[keep], values[keep]
+
+
+def positive_rows(series):
+    """Positions of the entries of `series` greater than 0."""
+    positions, values = nonzero(series)
+    return positions[values > 0]
+
+
+def take(series, rows):
+    """Dense float values of `series` at the positions `rows`."""
+    return np.asarray(series.array.take(np.asarray(rows)), dtype=np.float64)
+
+
+def sum_by(series, codes, n_groups):
+    """Sums of `series` per group, for group codes 0..n_groups-1 aligned with the series.
+
+    Only the nonzero entries are visited; entries whose code is outside the range are ignored.
+    """
+    positions, values = nonzero(series)
+    codes = np.asarray(codes)[positions]
+    valid = (codes >= 0) & (codes < n_groups)
+    return np.bincount(codes[valid], weights=values[valid], minlength=n_groups)
@@ -0,0 +1,194 @@
+import functools
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+import geometry
+
+# Point-in-polygon assignment of coordinates (field reports, lightning strikes) to boundaries such
+# as districts.json, for batches of millions of points.
+#
+# A regular grid is laid over the boundaries. A cell that no boundary edge touches lies wholly
+# inside one feature (or outside all of them), so its owner is found once at build time and every
+# point falling in it is assigned by a lookup. Only points in cells crossed by an edge are tested,
+# and only against the features whose bounding box covers that cell, with an even-odd ray cast
+# vectorised over points and edges.
+
+OUTSIDE = -1
+BORDER = -2
+# Grid cells along the longer side of the boundaries' extent
+DEFAULT_GRID_SIZE = 512
+# Point x edge comparisons per ray-casting block
+BLOCK_ELEMENTS = 1 << 21
+
+
+@dataclass(frozen=True)
+class SpatialIndex:
+    names: np.ndarray          # feature names, as in the boundary file
+    origin: tuple              # (lon, lat) of the grid's lower-left corner
+    cell_size: float
+    shape: tuple               # (rows, cols) of the grid
+    cell_owner: np.ndarray     # per cell: owning feature, OUTSIDE, or BORDER (needs a ray cast)
+    cell_offsets: np.ndarray   # candidates of cell c are cell_features[cell_offsets[c]:cell_offsets[c + 1]]
+    cell_features: np.ndarray
+    edge_offsets: np.ndarray   # edges of feature k are edges[edge_offsets[k]:edge_offsets[k + 1]]
+    edges: np.ndarray          # float64 (edges, 4): x1, y1, x2, y2
+
+    def _cells(self, lons, lats):
+        rows, cols = self.shape
+        col = np.floor((lons - self.origin[0]) / self.cell_size)
+        row = np.floor((lats - self.origin[1]) / self.cell_size)
+        inside = (col >= 0) & (col < cols) & (row >= 0) & (row < rows)
+        cells = np.full(len(lons), -1, dtype=np.int64)
+        cells[inside] = row[inside].astype(np.int64) * cols + col[inside].astype(np.int64)
+        return cells
+
+    def assign(self, lons, lats):
+        """Index of the feature containing each point (OUTSIDE for none or a missing coordinate)."""
+        lons = np.asarray(lons, dtype=np.float64)
+        lats = np.asarray(lats, dtype=np.float64)
+        cells = self._cells(lons, lats)
+        result = np.full(len(lons), OUTSIDE, dtype=np.int32)
+        on_grid = cells >= 0
+        result[on_grid] = self.cell_owner[cells[on_grid]]
+
+        border = np.flatnonzero(result == BORDER)
+        result[border] = OUTSIDE
+        if len(border) == 0:
+            return result
+
+        # (point, candidate feature) pairs, grouped by feature
+        border_cells = cells[border]
+        counts = self.cell_offsets[border_cells + 1] - self.cell_offsets[border_cells]
+        points = np.repeat(border, counts)
+        starts = np.repeat(self.cell_offsets[border_cells], counts)
+        within = np.arange(len(points)) - np.repeat(np.cumsum(counts) - counts, counts)
+        features = self.cell_features[starts + within]
+        order = np.argsort(features, kind="stable")
+        points, features = points[order], features[order]
+        bounds = np.flatnonzero(np.diff(features)) + 1
+        for group in np.split(np.arange(len(points)), bounds):
+            if len(group) == 0:
+                continue
+            k = features[group[0]]
+            candidates = points[group]
+            hit = _ray_cast(lons[candidates], lats[candidates], self.edges[self.edge_offsets[k]:self.edge_offsets[k + 1]])
+            result[candidates[hit]] = k
+        return result
+
+
+def _ray_cast(xs, ys, edges):
+    """Even-odd test of the points (xs, ys) against a polygon given by its edges (holes included)."""
+    inside = np.zeros(len(xs), dtype=bool)
+    if len(edges) == 0 or len(xs) == 0:
+        return inside
+    x1, y1, x2, y2 = (edges[:, i] for i in range(4))
+    step = max(1, BLOCK_ELEMENTS // len(edges))
+    for lo in range(0, len(xs), step):
+        x = xs[lo:lo + step, None]
+        y = ys[lo:lo + step, None]
+        straddles = (y1 > y) != (y2 > y)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cross_x = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+        crossings = np.count_nonzero(straddles & (x < cross_x), axis=1)
+        inside[lo:lo + step] = (crossings % 2) == 1
+    return inside
+
+
+def _feature_edges(boundaries):
+    """Edges of every feature's rings, each ring closed back to its first vertex."""
+    coords = np.asarray(boundaries.coords, dtype=np.float64)
+    ring_offsets = np.asarray(boundaries.ring_offsets)
+    edges, edge_offsets = [], [0]
+    for k in range(len(boundaries)):
+        first_ring = boundaries.polygon_offsets[boundaries.feature_offsets[k]]
+        last_ring = boundaries.polygon_offsets[boundaries.feature_offsets[k + 1]]
+        for r in range(first_ring, last_ring):
+            ring = coords[ring_offsets[r]:ring_offsets[r + 1]]
+            if len(ring) >= 2:
+                edges.append(np.hstack([ring, np.roll(ring, -1, axis=0)]))
+        edge_offsets.append(sum(len(e) for e in edges))
+    edges = np.vstack(edges) if edges else np.empty((0, 4))
+    return edges, np.asarray(edge_offsets, dtype=np.int64)
+
+
+def _cover(x_lo, y_lo, x_hi, y_hi, origin, cell_size, shape):
+    """(cell, item) pairs for the grid cells each of the boxes overlaps."""
+    rows, cols = shape
+    c0 = np.clip(np.floor((x_lo - origin[0]) / cell_size), 0, cols - 1).astype(np.int64)
+    c1 = np.clip(np.floor((x_hi - origin[0]) / cell_size), 0, cols - 1).astype(np.int64)
+    r0 = np.clip(np.floor((y_lo - origin[1]) / cell_size), 0, rows - 1).astype(np.int64)
+    r1 = np.clip(np.floor((y_hi - origin[1]) / cell_size), 0, rows - 1).astype(np.int64)
+    widths, heights = c1 - c0 + 1, r1 - r0 + 1
+    counts = widths * heights
+    items = np.repeat(np.arange(len(counts)), counts)
+    within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    col = c0[items] + within % widths[items]
+    row = r0[items] + within // widths[items]
+    return row * cols + col, items
+
+
+def build_index(boundaries, grid_size=DEFAULT_GRID_SIZE):
+    """SpatialIndex over a geometry.Boundaries."""
+    bboxes = np.asarray(boundaries.bboxes, dtype=np.float64)
+    valid = ~np.isnan(bboxes).any(axis=1)
+    x_min, y_min = bboxes[valid, 0].min(), bboxes[valid, 1].min()
+    x_max, y_max = bboxes[valid, 2].max(), bboxes[valid, 3].max()
+    cell_size = max(x_max - x_min, y_max - y_min) / grid_size
+    origin = (x_min, y_min)
+    shape = (int((y_max - y_min) // cell_size) + 1, int((x_max - x_min) // cell_size) + 1)
+    n_cells = shape[0] * shape[1]
+
+    # Candidate features per cell, from the feature bounding boxes
+    feature_ids = np.flatnonzero(valid)
+    cells, items = _cover(*bboxes[valid].T, origin, cell_size, shape)
+    order = np.argsort(cells, kind="stable")
+    cell_features = feature_ids[items[order]].astype(np.int32)
+    cell_offsets = np.concatenate(([0], np.cumsum(np.bincount(cells, minlength=n_cells)))).astype(np.int64)
+
+    # Cells touched by an edge need a ray cast; every other cell has one owner, found from its centre
+    edges, edge_offsets = _feature_edges(boundaries)
+    x1, y1, x2, y2 = edges.T
+    edge_cells, _ = _cover(np.minimum(x1, x2), np.minimum(y1, y2), np.maximum(x1, x2), np.maximum(y1, y2), origin, cell_size, shape)
+    cell_owner = np.full(n_cells, OUTSIDE, dtype=np.int32)
+    cell_owner[edge_cells] = BORDER
+
+    index = SpatialIndex(
+        names=np.asarray(boundaries.names),
+        origin=origin,
+        cell_size=cell_size,
+        shape=shape,
+        cell_owner=cell_owner,
+        cell_offsets=cell_offsets,
+        cell_features=cell_features,
+        edge_offsets=edge_offsets,
+        edges=edges,
+    )
+    open_cells = np.flatnonzero((cell_owner != BORDER) & (np.diff(cell_offsets) > 0))
+    rows, cols = np.divmod(open_cells, shape[1])
+    centre_lons = origin[0] + (cols + 0.5) * cell_size
+    centre_lats = origin[1] + (rows + 0.5) * cell_size
+    cell_owner[open_cells] = BORDER
+    cell_owner[open_cells] = index.assign(centre_lons, centre_lats)
+    for arr in (cell_owner, cell_offsets, cell_features, edge_offsets, edges):
+        arr.flags.writeable = False
+    return index
+
+
+@functools.lru_cache(maxsize=None)
+def district_index(source="districts.json"):
+    """SpatialIndex over the district boundaries, built once per process."""
+    return build_index(geometry.load(source))
+
+
+def assign(lons, lats, index=None):
+    """Name of the district containing each point (None outside every district)."""
+    index = index or district_index()
+    names = np.append(index.names.astype(object), None)
+    return names[index.assign(lons, lats)]
+
+
+def assign_districts(df, lon_col, lat_col, index=None):
+    """District name for each row of `df` from its coordinates, as a Series aligned with `df`."""
+    return pd.Series(assign(df[lon_col].to_numpy(), df[lat_col].to_numpy(), index), index=df.index, name="district")
@@ -0,0 +1,98 @@
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import fiscal_calendar
+import Dashboard1
+
+# Dashboard1's filter step used to copy the cold-wave frame up to four times per rerun
+# (df.copy() before each filter), so peak memory grew with a multiple of the data size. The
+# masks plus one .loc gather per consumer must stay well below that.
+
+ROWS = 400_000
+DISTRICTS = [f"District {i:02d}" for i in range(38)]
+
+
+@pytest.fixture(scope="module")
+def cold_wave_frame():
+    rng = np.random.default_rng(0)
+    district = rng.integers(0, len(DISTRICTS), ROWS)
+    df = pd.DataFrame({
+        'date': pd.Timestamp("2022-11-01") + pd.to_timedelta(rng.integers(0, 600, ROWS), unit="D"),
+        # One string object per row, as the database driver returns them
+        'district': [DISTRICTS[d] + "" for d in district],
+        'block': [f"Block {d:02d}-{b}" for d, b in zip(district, rng.integers(0, 14, ROWS))],
+        'district_code': district.astype(np.int64),
+    })
+    for col in Dashboard1.KPI_SUM_COLS:
+        df[col] = rng.integers(0, 50, ROWS).astype(np.float64)
+    df = df.sort_values('date', kind="stable").reset_index(drop=True)
+    return fiscal_calendar.add_calendar_columns(df, 'date')
+
+
+def filter_with_masks(df, start, end, district, block):
+    treemap_mask, kpi_mask = Dashboard1.filter_masks(df, start, end, district, block)
+    kpi_ts_df = df.loc[kpi_mask, Dashboard1.KPI_INPUT_COLS]
+    treemap_input = df.loc[treemap_mask, Dashboard1.TREEMAP_INPUT_COLS]
+    return kpi_ts_df, treemap_input
+
+
+def filter_with_copies(df, start, end, district, block):
+    """The filter path before the masks, kept as the regression baseline."""
+    base = df.copy()
+    base = base[(base['date'] >= start) & (base['date'] <= end)]
+    kpi_ts_df = base.copy()
+    if district:
+        kpi_ts_df = kpi_ts_df[kpi_ts_df['district'] == district]
+        if block:
+            kpi_ts_df = kpi_ts_df[kpi_ts_df['block'] == block]
+    treemap_input = base.copy()
+    if district:
+        treemap_input = treemap_input[treemap_input['district'] == district]
+    return kpi_ts_df, treemap_input
+
+
+def peak_allocation(func, *args):
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        result = func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak, result
+
+
+# Whole history unfiltered, and one district and block over a season
+CASES = [
+    (pd.Timestamp("2022-11-01"), pd.Timestamp("2024-06-30"), None, None),
+    (pd.Timestamp("2023-11-01"), pd.Timestamp("2024-02-28"), "District 05", "Block 05-3"),
+]
+
+
+@pytest.mark.parametrize("start, end, district, block", CASES)
+def test_mask_filter_peak_stays_well_below_data_size(cold_wave_frame, start, end, district, block):
+    frame_bytes = cold_wave_frame.memory_usage(deep=True).sum()
+    with pd.option_context("mode.copy_on_write", True):
+        peak, (kpi_ts_df, treemap_input) = peak_allocation(filter_with_masks, cold_wave_frame, start, end, district, block)
+        _, (old_kpi, old_treemap) = peak_allocation(filter_with_copies, cold_wave_frame, start, end, district, block)
+
+    assert peak < 0.5 * frame_bytes
+    # Same rows as the copying path
+    pd.testing.assert_frame_equal(kpi_ts_df, old_kpi[Dashboard1.KPI_INPUT_COLS])
+    pd.testing.assert_frame_equal(treemap_input, old_treemap[Dashboard1.TREEMAP_INPUT_COLS])
+
+
+def test_copying_filter_peak_scales_with_data_size(cold_wave_frame):
+    """Regression baseline: the old path's peak is a large share of the frame and several times the
+    mask path's, so the bound above is measuring the copies, not noise."""
+    start, end, district, block = CASES[0]
+    frame_bytes = cold_wave_frame.memory_usage(deep=True).sum()
+    with pd.option_context("mode.copy_on_write", True):
+        new_peak, _ = peak_allocation(filter_with_masks, cold_wave_frame, start, end, district, block)
+        old_peak, _ = peak_allocation(filter_with_copies, cold_wave_frame, start, end, district, block)
+    # The old path fails the bound the mask path is held to
+    assert old_peak >= 0.5 * frame_bytes
+    assert old_peak > 3 * new_peak
@@ -0,0 +1,97 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import geometry
+import spatial
+
+DISTRICTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "districts.json")
+POINTS_PER_KIND = 2000
+
+
+@pytest.fixture(scope="module")
+def boundaries(tmp_path_factory):
+    return geometry.load(DISTRICTS, cache_dir=str(tmp_path_factory.mktemp("geometry")))
+
+
+@pytest.fixture(scope="module")
+def index(boundaries):
+    return spatial.build_index(boundaries)
+
+
+def brute_force(boundaries, lons, lats):
+    """Feature containing each point by an even-odd ray cast over every edge of every feature."""
+    result = np.full(len(lons), spatial.OUTSIDE, dtype=np.int32)
+    x, y = lons[:, None], lats[:, None]
+    for k in range(len(boundaries)):
+        crossings = np.zeros(len(lons), dtype=np.int64)
+        for polygon in boundaries.polygons(k):
+            for ring in polygon:
+                ring = np.asarray(ring, dtype=np.float64)
+                x1, y1 = ring[:, 0], ring[:, 1]
+                x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    cross_x = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+                crossings += np.count_nonzero(((y1 > y) != (y2 > y)) & (x < cross_x), axis=1)
+        result[(crossings % 2 == 1) & (result == spatial.OUTSIDE)] = k
+    return result
+
+
+def points_in_cells(index, owners, rng):
+    """Random points inside random grid cells whose build-time owner is one of `owners`."""
+    cells = np.flatnonzero(np.isin(index.cell_owner, owners))
+    picked = rng.choice(cells, POINTS_PER_KIND)
+    rows, cols = np.divmod(picked, index.shape[1])
+    lons = index.origin[0] + (cols + rng.random(POINTS_PER_KIND)) * index.cell_size
+    lats = index.origin[1] + (rows + rng.random(POINTS_PER_KIND)) * index.cell_size
+    return lons, lats
+
+
+def points_around_extent(boundaries, rng):
+    """Random points just outside the boundaries' bounding box, on all four sides."""
+    bboxes = np.asarray(boundaries.bboxes, dtype=np.float64)
+    x_min, y_min = np.nanmin(bboxes[:, :2], axis=0)
+    x_max, y_max = np.nanmax(bboxes[:, 2:], axis=0)
+    n = POINTS_PER_KIND // 4
+    eps = 1e-6
+    along_x = rng.uniform(x_min, x_max, n)
+    along_y = rng.uniform(y_min, y_max, n)
+    lons = np.concatenate([along_x, along_x, np.full(n, x_min - eps), np.full(n, x_max + eps)])
+    lats = np.concatenate([np.full(n, y_min - eps), np.full(n, y_max + eps), along_y, along_y])
+    return lons, lats
+
+
+@pytest.mark.parametrize("owners", [[spatial.OUTSIDE], [spatial.BORDER]], ids=["outside_cells", "border_cells"])
+def test_assign_matches_brute_force_in_cells(boundaries, index, owners):
+    lons, lats = points_in_cells(index, owners, np.random.default_rng(7))
+    np.testing.assert_array_equal(index.assign(lons, lats), brute_force(boundaries, lons, lats))
+
+
+def test_assign_matches_brute_force_in_owned_cells(boundaries, index):
+    owned = np.unique(index.cell_owner[index.cell_owner >= 0])
+    lons, lats = points_in_cells(index, owned, np.random.default_rng(11))
+    result = index.assign(lons, lats)
+    np.testing.assert_array_equal(result, brute_force(boundaries, lons, lats))
+    assert (result >= 0).all()
+
+
+def test_points_outside_extent_are_outside(boundaries, index):
+    lons, lats = points_around_extent(boundaries, np.random.default_rng(13))
+    assert (index.assign(lons, lats) == spatial.OUTSIDE).all()
+    assert (brute_force(boundaries, lons, lats) == spatial.OUTSIDE).all()
+
+
+def test_assign_districts_names_rows(boundaries, index):
+    lons, lats = points_in_cells(index, [spatial.BORDER], np.random.default_rng(17))
+    lons[0] = lats[0] = np.nan
+    df = pd.DataFrame({"lon": lons, "lat": lats}, index=np.arange(len(lons)) * 10)
+    districts = spatial.assign_districts(df, "lon", "lat", index)
+    expected = brute_force(boundaries, lons, lats)
+
+    assert districts.index.equals(df.index)
+    assert districts.iloc[0] is None
+    assert districts.isna().to_numpy().tolist() == (expected == spatial.OUTSIDE).tolist()
+    inside = expected >= 0
+    assert districts[inside].tolist() == [str(name) for name in boundaries.names[expected[inside]]]
@@ -0,0 +1,47 @@
+import sys
+import threading
+import time
+import types
+
+import pandas as pd
+import streamlit as st
+
+import datastore
+import warmup
+
+
+def _warmup_threads():
+    return [t for t in threading.enumerate() if t.name == "eoc-warmup" and t.is_alive()]
+
+
+def _slow_loader(calls, name):
+    def load():
+        calls[name] += 1
+        time.sleep(0.3)
+        return pd.DataFrame({"value": [1, 2, 3]})
+    return load
+
+
+def test_clearing_resource_cache_keeps_one_thread_and_one_load(monkeypatch):
+    names = ("warmup_test_a", "warmup_test_b")
+    calls = {name: 0 for name in names}
+    specs = [datastore.DatasetSpec(name, _slow_loader(calls, name), ttl=3600) for name in names]
+    module = types.ModuleType("warmup_test_dashboard")
+    module.DATASETS = specs
+    monkeypatch.setitem(sys.modules, module.__name__, module)
+    monkeypatch.setattr(warmup, "_thread", None)
+    monkeypatch.setattr(warmup, "CHECK_INTERVAL", 3600)
+    before = len(_warmup_threads())
+
+    first = warmup.start((module.__name__,))
+    time.sleep(0.05)  # the initial loads are now running and hold the dataset locks
+    st.cache_resource.clear()
+    assert warmup.start((module.__name__,)) is first
+    # A session asking for the data mid-load waits for the warm-up's load instead of starting its own
+    datasets = [spec.get() for spec in specs]
+
+    assert len(_warmup_threads()) == before + 1
+    assert calls == {name: 1 for name in names}
+    assert all(len(dataset.frame) == 3 for dataset in datasets)
+    loads = {row["dataset"]: row["loads"] for row in datastore.stats() if row["dataset"] in names}
+    assert loads == {name: 1 for name in names}
@@ -0,0 +1,52 @@
+import json
+import re
+from functools import lru_cache
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+# Stylesheets are compiled once per process and pushed into the parent page's <head> once per
+# session. A <style> tag emitted through st.markdown is an element like any other, so it has to
+# be re-sent on every rerun or Streamlit removes it; a tag in <head> survives reruns untouched.
+
+_COMMENT_RE = re.compile(r"/\*.*?\*/", re.S)
+_TAG_RE = re.compile(r"</?style[^>]*>", re.I)
+_SPACE_RE = re.compile(r"\s+")
+_PUNCT_RE = re.compile(r"\s*([{};,>])\s*")
+
+
+@lru_cache(maxsize=None)
+def compile_stylesheet(css):
+    """Strips <style> tags, comments and redundant whitespace from a CSS block."""
+    css = _TAG_RE.sub("", css)
+    css = _COMMENT_RE.sub("", css)
+    css = _SPACE_RE.sub(" ", css)
+    css = _PUNCT_RE.sub(r"\1", css)
+    # Whitespace after a colon never matters, before one it can (".a :hover"), so only strip after
+    css = css.replace(": ", ":").replace(";}", "}")
+    return css.strip()
+
+
+def apply_theme(name, css, slot="page"):
+    """Injects the stylesheet `css` under `slot` unless this session already has `name` there.
+
+    Each slot maps to a single <style> element in the parent document, so switching dashboards
+    replaces the previous dashboard's rules instead of stacking them.
+    """
+    state_key = f"_theme_{slot}"
+    if st.session_state.get(state_key) == name:
+        return
+    stylesheet = compile_stylesheet(css)
+    components.html(f"""
+        <script>
+        const doc = window.parent.document;
+        let el = doc.getElementById("eoc-theme-{slot}");
+        if (!el) {{
+            el = doc.createElement("style");
+            el.id = "eoc-theme-{slot}";
+            doc.head.appendChild(el);
+        }}
+        el.textContent = {json.dumps(stylesheet)};
+        </script>
+    """, height=0)
+    st.session_state[state_key] = name
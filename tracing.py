@@ -0,0 +1,130 @@
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+import pandas as pd
+import streamlit as st
+
+# Per-rerun stage timings. main.py opens a run trace around each dashboard run; dashboards wrap
+# their stages in span() and the finished trace lands in an in-memory ring buffer and a rotating
+# log file. Streamlit executes every session's script on its own thread, so the active trace is
+# kept in a thread-local.
+
+LOG_PATH = os.path.join("logs", "dashboard_timings.log")
+HISTORY_SIZE = 200
+
+_local = threading.local()
+_run_ids = itertools.count(1)
+_history = deque(maxlen=HISTORY_SIZE)
+_history_lock = threading.Lock()
+_logger = None
+
+
+def _get_logger():
+    global _logger
+    if _logger is None:
+        logger = logging.getLogger("eoc.timings")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        if not logger.handlers:
+            try:
+                os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
+                logger.addHandler(RotatingFileHandler(LOG_PATH, maxBytes=1_000_000, backupCount=3, encoding="utf-8"))
+            except OSError as e:
+                print(f"Timing log disabled, could not open {LOG_PATH}: {e}")
+                logger.addHandler(logging.NullHandler())
+        _logger = logger
+    return _logger
+
+
+@contextmanager
+def run_trace(dashboard):
+    """Collects every span opened on this thread while the block runs into a single trace."""
+    trace = {
+        "run": next(_run_ids),
+        "dashboard": dashboard,
+        "started": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "spans": [],
+    }
+    previous = getattr(_local, "trace", None)
+    _local.trace = trace
+    start = time.perf_counter()
+    try:
+        yield trace
+    finally:
+        # Also reached on st.stop()/st.rerun(), which unwind the script with an exception
+        trace["total_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        _local.trace = previous
+        with _history_lock:
+            _history.append(trace)
+        _get_logger().info(json.dumps(trace))
+
+
+@contextmanager
+def fragment_trace(name):
+    """run_trace for an st.fragment. A fragment rerun skips main.py and so its run trace; inside a
+    full run the fragment's spans join the active trace instead."""
+    trace = getattr(_local, "trace", None)
+    if trace is not None:
+        yield trace
+        return
+    with run_trace(name) as trace:
+        yield trace
+
+
+@contextmanager
+def span(stage, rows=None):
+    """Times a stage of the current run. Set record["rows"] inside the block to log a row count."""
+    record = {"stage": stage, "ms": 0.0, "rows": rows}
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["ms"] = round((time.perf_counter() - start) * 1000, 2)
+        trace = getattr(_local, "trace", None)
+        if trace is not None:
+            trace["spans"].append(record)
+
+
+def emit_chart(stage, fig, **kwargs):
+    """st.plotly_chart wrapped in an `emit:<stage>` span (serialising the figure is the costly part)."""
+    with span(f"emit:{stage}"):
+        return st.plotly_chart(fig, **kwargs)
+
+
+def recent_runs(limit=None):
+    with _history_lock:
+        runs = list(_history)
+    return runs[-limit:] if limit else runs
+
+
+def render_diagnostics_panel():
+    """Hidden timing panel, shown by main.py when the page is opened with ?diagnostics=1."""
+    runs = recent_runs()
+    with st.expander("⏱️ Run Diagnostics", expanded=False):
+        if not runs:
+            st.caption("No runs recorded yet.")
+            return
+        rows = [
+            {"run": r["run"], "dashboard": r["dashboard"], "started": r["started"], **s}
+            for r in runs for s in r["spans"]
+        ]
+        totals = pd.DataFrame([{k: r[k] for k in ("run", "dashboard", "started", "total_ms")} for r in runs])
+        st.markdown("**Recent runs**")
+        st.dataframe(totals.iloc[::-1], use_container_width=True, hide_index=True, height=200)
+        if rows:
+            spans_df = pd.DataFrame(rows)
+            stage_summary = spans_df.groupby(['dashboard', 'stage'])['ms'].agg(
+                runs='count', mean_ms='mean', p95_ms=lambda s: s.quantile(0.95), max_ms='max'
+            ).round(2).reset_index().sort_values('mean_ms', ascending=False)
+            st.markdown("**Stage timings**")
+            st.dataframe(stage_summary, use_container_width=True, hide_index=True, height=250)
+            st.markdown("**Last run**")
+            st.dataframe(spans_df[spans_df['run'] == runs[-1]["run"]], use_container_width=True, hide_index=True)
@@ -0,0 +1,67 @@
+import importlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import datastore
+
+# Loads every dashboard's datasets in the background when the server starts, then keeps them
+# fresh, so opening a dashboard never waits on a cold SQL load. The loads run side by side in a
+# thread pool: they spend their time waiting on the database driver, which releases the GIL.
+# Each dashboard module lists its datasets as DATASETS (datastore.DatasetSpec entries).
+
+CHECK_INTERVAL = 60
+# Reload once a dataset has used this share of its TTL, so it is replaced before sessions see it expire
+REFRESH_AT = 0.8
+
+# The running warm-up thread. Kept here rather than in st.cache_resource, which "Clear cache" resets
+_thread = None
+_thread_lock = threading.Lock()
+
+
+def dataset_specs(modules):
+    specs = []
+    for module in modules:
+        specs.extend(getattr(importlib.import_module(module), "DATASETS", []))
+    return specs
+
+
+def _is_due(spec):
+    age = datastore.age(spec.name)
+    return age is None or age >= spec.ttl * REFRESH_AT
+
+
+def _load_all(pool, specs, load):
+    futures = {pool.submit(load, spec): spec for spec in specs}
+    for future, spec in futures.items():
+        try:
+            dataset = future.result()
+            if dataset.frame.empty:
+                print(f"Warm-up: {spec.name} came back empty, will retry")
+        except Exception as e:
+            print(f"Warm-up: loading {spec.name} failed: {e}")
+
+
+def _run(specs):
+    with ThreadPoolExecutor(max_workers=len(specs), thread_name_prefix="eoc-load") as pool:
+        _load_all(pool, specs, lambda spec: spec.get())
+        while True:
+            time.sleep(CHECK_INTERVAL)
+            due = [spec for spec in specs if _is_due(spec)]
+            if due:
+                _load_all(pool, due, lambda spec: spec.refresh())
+
+
+def start(modules):
+    """Starts the warm-up/refresh thread for the dashboard `modules` (a tuple) unless it is already
+    running, so every process has at most one."""
+    global _thread
+    with _thread_lock:
+        if _thread is not None and _thread.is_alive():
+            return _thread
+        specs = dataset_specs(modules)
+        if not specs:
+            return None
+        _thread = threading.Thread(target=_run, args=(specs,), name="eoc-warmup", daemon=True)
+        _thread.start()
+        return _thread